@@ -0,0 +1,312 @@
+"""End-to-end throughput of full games against the local fake model.
+
+Starts mcp_sse/fake_model.py in-process, launches the white and black agents
+against it, and plays games with the orchestrator's `play_game` loop over
+either transport:
+
+  • sse   — mcp_sse/white/white_agent.py and mcp_sse/black/black_agent.py,
+            --replicas processes per side behind an AgentPool, with up to
+            --concurrency games in flight on the shared sessions; with
+            --unified, mcp_sse/agent_server.py processes serving both sides.
+  • stdio — mcp_stdio/WhiteAgent.py and mcp_stdio/BlackAgent.py as child
+            processes, one game at a time.
+
+Reports plies/s, p50/p99 ply latency (one `move` call plus the orchestrator's
+own work) and resident memory growth per game of the orchestrator plus the
+agent processes; over SSE also the agents' model calls per accepted model
+move. The agents' move cache and pondering are off unless set in the
+environment, so repeated games keep exercising the model path. Run from the
+repository root:
+
+    uv run benchmarks/bench_e2e.py --games 4 --latency-ms 20
+    RANKED_CANDIDATES=3 uv run benchmarks/bench_e2e.py --transport sse --illegal-rate 0.3
+    uv run benchmarks/bench_e2e.py --transport sse --latency-ms 20 --tail-rate 0.05 --tail-ms 1000 --hedge-to gpt-4o-b
+    MODEL_RPM=540 uv run benchmarks/bench_e2e.py --transport sse --unified --games 8 --concurrency 8 --model-rpm 600
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import chess
+import httpx
+import uvicorn
+from autogen_ext.tools.mcp import McpWorkbench, StdioServerParams
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("HEADLESS", "1")
+os.environ.setdefault("METRICS_PORT", "0")
+from mcp_sse.agent_pool import AgentPool
+from mcp_sse.board import play_game
+from mcp_sse.fake_model import FakeModel, create_app
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_bytes(pid: int) -> int | None:
+    """Resident set size of `pid` (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def child_pids() -> list[int]:
+    """Direct children of this process, e.g. the stdio agents spawned by the MCP client."""
+    me = os.getpid()
+    pids = []
+    for entry in Path("/proc").glob("[0-9]*"):
+        try:
+            # the command name may contain spaces; the ppid follows its closing ')'
+            ppid = int(entry.joinpath("stat").read_text().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == me:
+            pids.append(int(entry.name))
+    return pids
+
+
+def total_rss(pids: list[int]) -> int | None:
+    sizes = [rss_bytes(pid) for pid in [os.getpid(), *pids]]
+    return None if None in sizes else sum(sizes)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def agent_env(model_url: str, **extra: str) -> dict[str, str]:
+    env = dict(os.environ)
+    env.update(AZURE_OPENAI_ENDPOINT=model_url, PYTHONUNBUFFERED="1", **extra)
+    env.setdefault("AZURE_OPENAI_API_KEY", "fake")
+    env.setdefault("MOVE_CACHE_SIZE", "0")
+    env.setdefault("PONDER", "0")
+    return env
+
+
+async def wait_ready(url: str, proc: asyncio.subprocess.Process, log_path: str, timeout: float = 60.0) -> float:
+    """Poll `url` until it answers 200; returns the seconds that took."""
+    started = time.monotonic()
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < started + timeout:
+            if proc.returncode is not None:
+                break
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return time.monotonic() - started
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.05)
+    raise RuntimeError(f"agent at {url} did not start; see {log_path}")
+
+
+async def play_games(wb_white: AgentPool | McpWorkbench, wb_black: AgentPool | McpWorkbench,
+                     games: int, concurrency: int, pids: list[int]) -> dict:
+    limit = asyncio.Semaphore(max(1, concurrency))
+    latencies: list[float] = []
+    plies = 0
+
+    async def one(number: int) -> None:
+        async with limit:
+            last = time.perf_counter()
+
+            def on_move(board: chess.Board) -> None:
+                nonlocal last, plies
+                now = time.perf_counter()
+                latencies.append(now - last)
+                last = now
+                plies += 1
+
+            await play_game(wb_white, wb_black, name=f"bench-{number}", on_move=on_move)
+
+    rss_before = total_rss(pids)
+    started = time.perf_counter()
+    await asyncio.gather(*(one(n) for n in range(1, games + 1)))
+    elapsed = time.perf_counter() - started
+    rss_after = total_rss(pids)
+    return {
+        "games": games,
+        "plies": plies,
+        "seconds": elapsed,
+        "plies_per_s": plies / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "rss_per_game": None if rss_before is None or rss_after is None else (rss_after - rss_before) / games,
+    }
+
+
+async def bench_sse(model_url: str, games: int, concurrency: int, log_dir: str, replicas: int = 1,
+                    unified: bool = False, **env: str) -> dict:
+    procs: list[asyncio.subprocess.Process] = []
+    urls: dict[str, list[str]] = {"white": [], "black": []}
+    ready: list[float] = []
+    # one color-agnostic agent serves both pools, or one agent per color
+    scripts = {"agent": ROOT / "mcp_sse" / "agent_server.py"} if unified else {
+        color: ROOT / "mcp_sse" / color / f"{color}_agent.py" for color in urls}
+    try:
+        for name, script in scripts.items():
+            for replica in range(1, replicas + 1):
+                port = free_port()
+                log_path = os.path.join(log_dir, f"sse_{name}_{replica}.log")
+                with open(log_path, "w") as log_file:
+                    proc = await asyncio.create_subprocess_exec(
+                        sys.executable, str(script),
+                        env=agent_env(model_url, FASTMCP_PORT=str(port), **env),
+                        cwd=str(ROOT), stdout=log_file, stderr=log_file,
+                    )
+                procs.append(proc)
+                url = f"http://127.0.0.1:{port}"
+                for color in urls if unified else [name]:
+                    urls[color].append(url)
+                ready.append(await wait_ready(f"{url}/ready", proc, log_path))
+
+        async with AgentPool("white", urls["white"]) as wb_white, AgentPool("black", urls["black"]) as wb_black:
+            result = await play_games(wb_white, wb_black, games, concurrency, [p.pid for p in procs])
+            calls = accepted = 0
+            model_p99 = 0.0
+            result["hedging"] = {}
+            result["rate_limit"] = {}
+            # a unified agent reports per side and is asked once, through the white pool
+            for side, pool in (("white", wb_white),) if unified else (("white", wb_white), ("black", wb_black)):
+                for replica in pool.replicas:
+                    stats = json.loads((await replica.workbench.call_tool("stats")).result[0].content)
+                    players = list(stats.values()) if unified else [stats]
+                    for player in players:
+                        calls += player["model"]["calls"]
+                        accepted += player["model"]["accepted"]
+                        model_p99 = max(model_p99, player["model"].get("p99_s", 0.0))
+                    # the model client, hence its hedging state, is shared by both sides
+                    if players[0].get("hedging"):
+                        result["hedging"][f"{side} {replica.url}"] = players[0]["hedging"]
+                    if players[0].get("rate_limit"):
+                        result["rate_limit"][f"{side} {replica.url}"] = players[0]["rate_limit"]
+            result["round_trips_per_move"] = calls / accepted if accepted else None
+            # the slowest player's p99 of one model call, hedge included
+            result["model_p99_ms"] = model_p99 * 1000
+            sizes = [rss_bytes(p.pid) for p in procs]
+            result["agents_rss"] = None if None in sizes else sum(sizes)
+            result["ready_s"] = max(ready)
+            return result
+    finally:
+        for proc in procs:
+            if proc.returncode is None:
+                proc.terminate()
+                try:
+                    await asyncio.wait_for(proc.wait(), 5)
+                except asyncio.TimeoutError:
+                    # uvicorn keeps waiting for open SSE streams after SIGTERM
+                    proc.kill()
+                    await proc.wait()
+
+
+async def bench_stdio(model_url: str, games: int) -> dict:
+    env = agent_env(model_url, MCP_PROTOCOL="stdio")
+
+    def params(script: str) -> StdioServerParams:
+        return StdioServerParams(command=sys.executable, args=["-u", str(ROOT / "mcp_stdio" / script)],
+                                 env=env, cwd=str(ROOT / "mcp_stdio"), timeout=90)
+
+    async with McpWorkbench(params("WhiteAgent.py")) as wb_white, \
+               McpWorkbench(params("BlackAgent.py")) as wb_black:
+        # the stdio agents keep one board and one conversation each: one game at a time
+        return await play_games(wb_white, wb_black, games, 1, child_pids())
+
+
+def report(transport: str, result: dict) -> None:
+    rss = result["rss_per_game"]
+    memory = f"{rss / 2**20:+.1f} MiB RSS/game" if rss is not None else "RSS n/a"
+    round_trips = result.get("round_trips_per_move")
+    calls = f", {round_trips:.2f} model calls/model move" if round_trips else ""
+    agents = result.get("agents_rss")
+    if agents is not None:
+        calls += f", agents {agents / 2**20:.0f} MiB RSS"
+    if result.get("ready_s"):
+        calls += f", slowest agent ready after {result['ready_s']:.2f}s"
+    print(f"{transport:5}: {result['games']} games, {result['plies']} plies in {result['seconds']:.1f}s "
+          f"→ {result['plies_per_s']:.1f} plies/s, p50 {result['p50_ms']:.1f} ms, "
+          f"p99 {result['p99_ms']:.1f} ms, {memory}{calls}")
+    for side, limits in result.get("rate_limit", {}).items():
+        for deployment, limit in limits.items():
+            print(f"       {side} {deployment} quota: {limit['admitted']} admitted, {limit['queued']} queued "
+                  f"(avg wait {limit['wait_avg_s'] * 1000:.0f} ms, max {limit['wait_max_s'] * 1000:.0f} ms), "
+                  f"{limit['throttled']} throttled")
+    for side, hedging in result.get("hedging", {}).items():
+        print(f"       {side} hedging: {hedging['hedge_rate']:.1%} of model calls hedged, "
+              f"{hedging['hedge_wins']} won by the hedge, delay {hedging['hedge_delay_s'] * 1000:.0f} ms, "
+              f"model p99 {hedging['p99_model_s'] * 1000:.0f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transport", choices=("sse", "stdio", "both"), default="both")
+    parser.add_argument("--games", type=int, default=2)
+    parser.add_argument("--concurrency", type=int, default=2, help="SSE games in flight")
+    parser.add_argument("--replicas", type=int, default=1, help="SSE agent processes per side, behind an AgentPool")
+    parser.add_argument("--unified", action="store_true",
+                        help="SSE agents are mcp_sse/agent_server.py processes playing both sides")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--illegal-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="share of model calls that get --tail-ms extra")
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--model-rpm", type=float, default=0.0,
+                        help="fake model quota in requests per minute, answered with 429 beyond it")
+    parser.add_argument("--hedge-to", metavar="DEPLOYMENT",
+                        help="run SSE without and with hedging to DEPLOYMENT and report the model-call and ply p99")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    model = FakeModel(args.latency_ms, args.jitter_ms, args.error_rate, args.illegal_rate, args.seed,
+                      args.tail_rate, args.tail_ms, rpm=args.model_rpm)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(model), host="127.0.0.1", port=port, log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    model_url = f"http://127.0.0.1:{port}"
+    log_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    try:
+        if args.hedge_to:
+            plain = await bench_sse(model_url, args.games, args.concurrency, log_dir, args.replicas, args.unified,
+                                    MODEL_DEPLOYMENTS="")
+            report("sse", plain)
+            hedged = await bench_sse(model_url, args.games, args.concurrency, log_dir, args.replicas, args.unified,
+                                     MODEL_DEPLOYMENTS=args.hedge_to,
+                                     HEDGE_INITIAL_DELAY=os.getenv("HEDGE_INITIAL_DELAY", "1"))
+            report("sse+h", hedged)
+            # the hedge acts on single model calls; a ply also carries the agent's and orchestrator's own work
+            print(f"hedging: p99 model call {plain['model_p99_ms']:.1f} → {hedged['model_p99_ms']:.1f} ms "
+                  f"({plain['model_p99_ms'] - hedged['model_p99_ms']:+.1f} ms improvement), "
+                  f"p99 ply latency {plain['p99_ms']:.1f} → {hedged['p99_ms']:.1f} ms "
+                  f"({plain['p99_ms'] - hedged['p99_ms']:+.1f} ms)")
+        elif args.transport in ("sse", "both"):
+            report("sse", await bench_sse(model_url, args.games, args.concurrency, log_dir, args.replicas,
+                                          args.unified))
+        if args.transport in ("stdio", "both"):
+            report("stdio", await bench_stdio(model_url, args.games))
+    finally:
+        server.should_exit = True
+        await serving
+    print(f"fake model: {model.requests} requests, {model.errors} injected errors, "
+          f"{model.illegal} illegal replies, {model.throttled} throttled; agent logs in {log_dir}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,57 @@
+"""Throughput of the static evaluator in mcp_sse/evaluator.py.
+
+Plays seeded random games to collect positions, then times batch scoring
+(`score_positions`) and full move ranking (`rank_moves`, what the agents run
+before every prompt). Run from the repository root:
+
+    uv run benchmarks/bench_evaluator.py --positions 5000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import chess
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mcp_sse.evaluator import rank_moves, score_positions
+
+
+def sample_positions(count: int, seed: int) -> list[chess.Board]:
+    rng = random.Random(seed)
+    positions: list[chess.Board] = []
+    board = chess.Board()
+    while len(positions) < count:
+        if board.is_game_over() or board.ply() > 160:
+            board = chess.Board()
+        board.push(rng.choice(list(board.legal_moves)))
+        positions.append(board.copy(stack=False))
+    return positions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--positions", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions, args.seed)
+
+    t0 = time.perf_counter()
+    score_positions(positions)
+    scored = time.perf_counter() - t0
+
+    rank_count = min(len(positions), 1000)
+    t0 = time.perf_counter()
+    moves = sum(len(rank_moves(b)) for b in positions[:rank_count])
+    ranked = time.perf_counter() - t0
+
+    print(f"score_positions: {len(positions)} positions in {scored:.3f}s "
+          f"→ {len(positions) / scored:,.0f} positions/s")
+    print(f"rank_moves:      {rank_count} positions ({moves} moves) in {ranked:.3f}s "
+          f"→ {rank_count / ranked:,.0f} positions/s, {moves / ranked:,.0f} moves/s")
+
+
+if __name__ == "__main__":
+    main()
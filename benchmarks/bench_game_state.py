@@ -0,0 +1,99 @@
+"""Per-ply game-over checks on long games: python-chess scans vs mcp_sse/game_state.py.
+
+Plays seeded random games (which run long: a few hundred plies, ended by the
+seventy-five-move rule, fivefold repetition or the --max-plies cap) and
+times, for every ply, pushing the move and asking whether the game is over:
+
+  • board — `board.push` + `board.is_game_over()`, which scans the move
+            stack for repetitions, plus the end-of-game `can_claim_*` summary;
+  • state — `GameState.push` + `GameState.is_game_over()`, plus its
+            `claimable_draw()` summary.
+
+Also checks that both agree on every ply and that the incremental hash equals
+`chess.polyglot.zobrist_hash`. Run from the repository root:
+
+    uv run benchmarks/bench_game_state.py --games 50 --max-plies 1000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import chess
+import chess.polyglot
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mcp_sse.game_state import GameState
+
+
+def random_game(rng: random.Random, max_plies: int) -> list[chess.Move]:
+    board = chess.Board()
+    while not board.is_game_over() and board.ply() < max_plies:
+        board.push(rng.choice(list(board.legal_moves)))
+    return board.move_stack
+
+
+def time_board(moves: list[chess.Move], per_ply: list[float]) -> float:
+    board = chess.Board()
+    started = time.perf_counter()
+    for ply, move in enumerate(moves):
+        t0 = time.perf_counter()
+        board.push(move)
+        board.is_game_over()
+        per_ply[ply] += time.perf_counter() - t0
+    board.can_claim_fifty_moves() or board.can_claim_threefold_repetition()
+    return time.perf_counter() - started
+
+
+def time_state(moves: list[chess.Move], per_ply: list[float]) -> float:
+    state = GameState()
+    started = time.perf_counter()
+    for ply, move in enumerate(moves):
+        t0 = time.perf_counter()
+        state.push(move)
+        state.is_game_over()
+        per_ply[ply] += time.perf_counter() - t0
+    state.claimable_draw()
+    return time.perf_counter() - started
+
+
+def verify(moves: list[chess.Move]) -> None:
+    board, state = chess.Board(), GameState()
+    for move in moves:
+        board.push(move)
+        state.push(move)
+        assert state.hash == chess.polyglot.zobrist_hash(board), f"hash differs after {board.ply()} plies"
+        expected = board.outcome()
+        assert state.outcome() == expected, f"{state.outcome()} != {expected} after {board.ply()} plies"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--max-plies", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    games = [random_game(rng, args.max_plies) for _ in range(args.games)]
+    for moves in games:
+        verify(moves)
+    plies = sum(len(moves) for moves in games)
+    longest = max(len(moves) for moves in games)
+    print(f"{len(games)} games, {plies} plies (longest {longest}); outcomes and hashes agree on every ply")
+
+    for label, timer in (("board", time_board), ("state", time_state)):
+        per_ply = [0.0] * longest
+        counts = [sum(1 for moves in games if len(moves) > ply) for ply in range(longest)]
+        total = sum(timer(moves, per_ply) for moves in games)
+        buckets = []
+        for start in range(0, longest, 100):
+            n = sum(counts[start:start + 100])
+            buckets.append(f"{start}-{start + 99}: {sum(per_ply[start:start + 100]) / n * 1e6:.1f}")
+        print(f"{label}: {total * 1000:.0f} ms total, {total / plies * 1e6:.1f} µs/ply; "
+              f"µs/ply by ply range: {', '.join(buckets)}")
+
+
+if __name__ == "__main__":
+    main()
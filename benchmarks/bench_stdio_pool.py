@@ -0,0 +1,108 @@
+"""Per-game startup latency of the stdio agents: fresh processes vs a warm pool.
+
+For each game, measures the time until both mcp_stdio agents have answered
+their first `move` (against the in-process fake model, so the move itself
+costs next to nothing):
+
+  • cold — what BoardAgent.py used to do: spawn WhiteAgent.py and
+           BlackAgent.py, initialize their MCP sessions, ask, stop them.
+  • pool — lease a worker per color from mcp_stdio/WorkerPool.py pools
+           started once up front (their one-off startup is reported apart).
+
+With --crash the pooled processes are killed once after warm-up, so the
+first leased game also times a crash restart. Run from the repository root:
+
+    uv run benchmarks/bench_stdio_pool.py --games 5
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+import chess
+import uvicorn
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "mcp_stdio"))
+from bench_e2e import agent_env, child_pids, free_port, percentile
+from mcp_sse.fake_model import FakeModel, create_app
+from WorkerPool import StdioWorker, StdioWorkerPool
+
+START_FEN = chess.Board().fen()
+AFTER_E4 = "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1"
+
+
+async def first_moves(white: StdioWorker, black: StdioWorker) -> None:
+    for worker, fen in ((white, START_FEN), (black, AFTER_E4)):
+        result = await worker.call_tool("move", {"fen": fen})
+        if result.is_error:
+            raise RuntimeError(f"{worker.name}: {result.result}")
+
+
+async def cold_game(env: dict[str, str]) -> float:
+    started = time.perf_counter()
+    pool_white = StdioWorkerPool(str(ROOT / "mcp_stdio" / "WhiteAgent.py"), env=env, cwd=str(ROOT / "mcp_stdio"))
+    pool_black = StdioWorkerPool(str(ROOT / "mcp_stdio" / "BlackAgent.py"), env=env, cwd=str(ROOT / "mcp_stdio"))
+    white, black = pool_white.workers[0], pool_black.workers[0]
+    try:
+        await asyncio.gather(white.start(), black.start())
+        await first_moves(white, black)
+        return time.perf_counter() - started
+    finally:
+        await asyncio.gather(white.stop(), black.stop())
+
+
+async def pooled_games(env: dict[str, str], games: int, crash: bool) -> tuple[float, list[float], dict]:
+    pools = [StdioWorkerPool(str(ROOT / "mcp_stdio" / script), env=env, cwd=str(ROOT / "mcp_stdio"))
+             for script in ("WhiteAgent.py", "BlackAgent.py")]
+    started = time.perf_counter()
+    await asyncio.gather(*(pool.start() for pool in pools))
+    warmup = time.perf_counter() - started
+    latencies = []
+    try:
+        if crash:
+            for pid in child_pids():
+                os.kill(pid, signal.SIGKILL)
+        for _ in range(games):
+            started = time.perf_counter()
+            async with pools[0].lease() as white, pools[1].lease() as black:
+                await first_moves(white, black)
+            latencies.append(time.perf_counter() - started)
+        return warmup, latencies, {"white": pools[0].stats(), "black": pools[1].stats()}
+    finally:
+        await asyncio.gather(*(pool.stop() for pool in pools))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--crash", action="store_true", help="kill the pooled processes once after warm-up")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(FakeModel()), host="127.0.0.1", port=port,
+                                           log_level="warning"))
+    serving = asyncio.create_task(server.serve())
+    env = agent_env(f"http://127.0.0.1:{port}", MCP_PROTOCOL="stdio")
+    try:
+        cold = [await cold_game(env) for _ in range(args.games)]
+        warmup, pooled, stats = await pooled_games(env, args.games, args.crash)
+    finally:
+        server.should_exit = True
+        await serving
+
+    for label, samples in (("cold", cold), ("pool", pooled)):
+        print(f"{label}: {len(samples)} games, time to both first moves p50 {percentile(samples, 0.5) * 1000:.0f} ms, "
+              f"max {max(samples) * 1000:.0f} ms")
+    print(f"pool warm-up (once, both colors in parallel): {warmup * 1000:.0f} ms")
+    print(f"pool stats: {stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""Early adjudication of decided games, so they stop costing model calls.
+
+`Adjudicator` is fed each position of one game as it is reached and ends the
+game when one of its rules fires (each is off when set to 0):
+
+  • material     — one side is ahead by at least `material` centipawns
+                   (evaluator.MATERIAL values) for `material_plies`
+                   consecutive plies: that side wins;
+  • no progress  — `no_progress_plies` plies without a capture or a pawn
+                   move: draw;
+  • repetition   — the position occurred `repetitions` times: draw;
+  • max plies    — the game reached `max_plies` plies: draw.
+
+Every rule only looks at the current position and a counter carried over
+from the previous one, so a check costs the same on every ply. Verdicts are
+`(result, rule, reason)`, e.g. ("1-0", "material", "material +9.0 for 10 plies").
+"""
+import chess
+
+from mcp_sse.evaluator import MATERIAL
+from mcp_sse.game_state import GameState
+
+
+def material_balance(board: chess.Board) -> int:
+    """White's material minus Black's, in centipawns."""
+    balance = 0
+    for piece_type in (chess.PAWN, chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN):
+        balance += MATERIAL[piece_type] * (chess.popcount(board.pieces_mask(piece_type, chess.WHITE)) -
+                                           chess.popcount(board.pieces_mask(piece_type, chess.BLACK)))
+    return balance
+
+
+class Adjudicator:
+    """Adjudication rules and their running state for one game."""
+
+    def __init__(self,
+                 material: int = 0,
+                 material_plies: int = 10,
+                 no_progress_plies: int = 0,
+                 repetitions: int = 0,
+                 max_plies: int = 0):
+        self.material = material
+        self.material_plies = max(1, material_plies)
+        self.no_progress_plies = no_progress_plies
+        self.repetitions = repetitions
+        self.max_plies = max_plies
+        # consecutive plies the same side has held the material lead (+ White, - Black)
+        self._streak = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.material or self.no_progress_plies or self.repetitions or self.max_plies)
+
+    def check(self, state: GameState) -> tuple[str, str, str] | None:
+        """Call once per position reached; the verdict if the game should end here."""
+        board = state.board
+        if self.material:
+            balance = material_balance(board)
+            leader = 1 if balance >= self.material else -1 if balance <= -self.material else 0
+            self._streak = self._streak + leader if leader and self._streak * leader >= 0 else leader
+            if abs(self._streak) >= self.material_plies:
+                return ("1-0" if leader > 0 else "0-1", "material",
+                        f"material {balance / 100:+.1f} for {abs(self._streak)} plies")
+        if self.no_progress_plies and board.halfmove_clock >= self.no_progress_plies:
+            return "1/2-1/2", "no_progress", f"no capture or pawn move for {board.halfmove_clock} plies"
+        if self.repetitions and state.repetitions() >= self.repetitions:
+            return "1/2-1/2", "repetition", f"position repeated {state.repetitions()} times"
+        if self.max_plies and board.ply() >= self.max_plies:
+            return "1/2-1/2", "max_plies", f"reached {board.ply()} plies"
+        return None
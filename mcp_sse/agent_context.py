@@ -0,0 +1,73 @@
+"""Context isolation for the AssistantAgents behind the `move` tool.
+
+An AssistantAgent keeps every task and reply in its model context, so a single
+long-lived agent sends an ever-growing prompt. `AgentContextPolicy` decides
+which agent (and therefore which history) a request runs against:
+
+  • request — a fresh agent per move; only that move's retries share history.
+  • game    — one agent per `game_id`, its history capped to the last
+              `window` messages; at most `max_games` games are remembered
+              (least recently used are dropped). Requests without a
+              game id fall back to `request`.
+  • window  — one shared agent for everything, history capped to `window`
+              messages. Meant for a single game: concurrent requests (several
+              games, MAX_IN_FLIGHT > 1, the batched `moves` tool) take turns
+              on it through `lock`, so one game's prompt never carries
+              another's moves, at the cost of running them one at a time.
+"""
+import asyncio
+from collections import OrderedDict
+from contextlib import AbstractAsyncContextManager, nullcontext
+from typing import Callable
+
+from autogen_agentchat.agents import AssistantAgent
+from autogen_core.model_context import BufferedChatCompletionContext, ChatCompletionContext
+
+POLICIES = ("request", "game", "window")
+
+AgentFactory = Callable[[ChatCompletionContext | None], AssistantAgent]
+
+
+class AgentContextPolicy:
+    """Hands out agents according to the configured context policy."""
+
+    def __init__(self, factory: AgentFactory, policy: str = "request", window: int = 20, max_games: int = 64):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown context policy {policy!r}, expected one of {POLICIES}")
+        self.factory = factory
+        self.policy = policy
+        self.window = window
+        self.max_games = max_games
+        self._games: OrderedDict[str, AssistantAgent] = OrderedDict()
+        self._shared: AssistantAgent | None = None
+        self._shared_lock = asyncio.Lock()
+
+    def _bounded(self) -> AssistantAgent:
+        return self.factory(BufferedChatCompletionContext(buffer_size=self.window))
+
+    def agent_for(self, game_id: str | None = None) -> AssistantAgent:
+        """The agent a request for `game_id` should run against."""
+        if self.policy == "window":
+            if self._shared is None:
+                self._shared = self._bounded()
+            return self._shared
+        if self.policy == "game" and game_id:
+            agent = self._games.get(game_id)
+            if agent is None:
+                agent = self._games[game_id] = self._bounded()
+                while len(self._games) > self.max_games:
+                    self._games.popitem(last=False)
+            self._games.move_to_end(game_id)
+            return agent
+        return self.factory(None)
+
+    def lock(self, agent: AssistantAgent) -> AbstractAsyncContextManager:
+        """Hold while a request runs on `agent`; only the shared `window` agent needs it."""
+        return self._shared_lock if agent is self._shared else nullcontext()
+
+    def forget(self, game_id: str) -> None:
+        """Drop the history of a finished game."""
+        self._games.pop(game_id, None)
+
+    def stats(self) -> dict:
+        return {"policy": self.policy, "window": self.window, "games": len(self._games)}
@@ -0,0 +1,241 @@
+"""A pool of agent replicas for one side, used by the orchestrator in place of one workbench.
+
+`AgentPool` keeps an `McpWorkbench` session to every replica URL and
+answers `call_tool` like a single workbench would:
+
+  • routing — each call goes to the healthy replica with the fewest
+    outstanding calls (ties broken by fewest calls served), so replicas
+    behind a slow model get less work;
+  • failover — a call that errors is retried once on every other healthy
+    replica before the error is returned; calls in flight on a replica that
+    gets ejected fail over the same way;
+  • ejection — a replica with `eject_after` consecutive errors, or one that
+    fails a health check, is taken out of rotation;
+  • reconnect — every `health_interval` seconds healthy replicas are probed
+    with `list_tools` and ejected ones get a fresh session; a replica
+    rejoins as soon as its new session answers;
+  • affinity — `call_routed` also returns the replica that answered, and
+    `call_on` sends a call to that replica only (no failover), for state
+    that lives in one replica such as a game session;
+  • tracing — every call to a replica is an "mcp.call_tool" span and
+    carries its traceparent to the agent (see mcp_sse/tracing.py).
+
+    WHITE_URLS=http://white-1:8001,http://white-2:8001 uv run ./mcp_sse/board.py
+"""
+import asyncio
+import logging
+from typing import Any, Mapping, Sequence
+
+from autogen_core.tools import ToolResult
+from autogen_ext.tools.mcp import McpWorkbench, SseServerParams
+
+from mcp_sse.metrics import counter, gauge
+from mcp_sse.tracing import CLIENT, inject, span
+
+log = logging.getLogger("board")
+
+POOL_REQUESTS = counter("chess_board_pool_requests_total", "Tool calls per agent replica", ["side", "url", "outcome"])
+POOL_OUTSTANDING = gauge("chess_board_pool_outstanding", "Tool calls in flight per agent replica", ["side", "url"])
+POOL_HEALTHY = gauge("chess_board_pool_healthy_replicas", "Replicas in rotation", ["side"])
+POOL_EJECTIONS = counter("chess_board_pool_ejections_total", "Replicas taken out of rotation", ["side", "url"])
+
+
+class Replica:
+    """One agent endpoint: its session, load and health."""
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.workbench: McpWorkbench | None = None
+        self.healthy = False
+        self.outstanding = 0
+        self.served = 0
+        self.failures = 0
+        self.ejections = 0
+        # calls in flight; a dead SSE session never answers them, so ejection cancels them
+        self.inflight: set[asyncio.Task] = set()
+
+    async def connect(self) -> None:
+        """Open a fresh session and check that it answers."""
+        await self.close()
+        workbench = McpWorkbench(SseServerParams(url=f"{self.url}/sse", timeout=self.timeout))
+        await workbench.start()
+        self.workbench = workbench
+        await workbench.list_tools()
+
+    async def close(self) -> None:
+        workbench, self.workbench = self.workbench, None
+        if workbench is not None:
+            try:
+                await asyncio.wait_for(workbench.stop(), 5)
+            except Exception as e:
+                log.debug(f"Closing session to {self.url} failed: {e!r}")
+
+
+class AgentPool:
+    """Least-outstanding routing over several replicas of one agent."""
+
+    def __init__(self,
+                 side: str,
+                 urls: Sequence[str],
+                 timeout: float = 90,
+                 eject_after: int = 3,
+                 health_interval: float = 10.0,
+                 health_timeout: float = 5.0):
+        if not urls:
+            raise ValueError(f"no agent URLs for {side}")
+        self.side = side
+        self.replicas = [Replica(url, timeout) for url in urls]
+        self.eject_after = eject_after
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._health_task: asyncio.Task | None = None
+        # set while at least one replica is in rotation
+        self._available = asyncio.Event()
+
+    async def start(self) -> None:
+        await asyncio.gather(*(self._reconnect(r) for r in self.replicas))
+        if not any(r.healthy for r in self.replicas):
+            log.error(f"[{self.side} pool] no replica reachable yet; retrying every {self.health_interval}s")
+        self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await asyncio.gather(*(r.close() for r in self.replicas))
+
+    async def __aenter__(self) -> "AgentPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    def _pick(self, exclude: set[str]) -> Replica | None:
+        candidates = [r for r in self.replicas if r.healthy and r.url not in exclude]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda r: (r.outstanding, r.served))
+
+    async def call_tool(self, name: str, arguments: Mapping[str, Any] | None = None) -> ToolResult:
+        """Call `name` on the least busy healthy replica, failing over to the others on errors.
+
+        With no replica in rotation this waits for one to reconnect; callers bound
+        the wait with their own timeout.
+        """
+        return (await self.call_routed(name, arguments))[1]
+
+    async def call_routed(self, name: str,
+                          arguments: Mapping[str, Any] | None = None) -> tuple[str | None, ToolResult]:
+        """`call_tool`, also returning the URL of the replica that answered (None if none did)."""
+        await self._available.wait()
+        tried: set[str] = set()
+        result: ToolResult | None = None
+        while (replica := self._pick(tried)) is not None:
+            tried.add(replica.url)
+            result = await self._call(replica, name, arguments)
+            if not result.is_error:
+                return replica.url, result
+        if result is None:
+            return None, ToolResult(name=name, result=[], is_error=True)
+        return None, result
+
+    async def call_on(self, url: str, name: str, arguments: Mapping[str, Any] | None = None) -> ToolResult:
+        """Call `name` on the replica at `url` only; an error result if it is out of rotation."""
+        replica = next((r for r in self.replicas if r.url == url), None)
+        if replica is None or not replica.healthy:
+            return ToolResult(name=name, result=[], is_error=True)
+        return await self._call(replica, name, arguments)
+
+    async def _call(self, replica: Replica, name: str, arguments: Mapping[str, Any] | None) -> ToolResult:
+        with span("mcp.call_tool", kind=CLIENT, tool=name, side=self.side, url=replica.url) as call_span:
+            result = await self._send(replica, name, inject(arguments))
+            if result.is_error:
+                call_span.fail("error result")
+            return result
+
+    async def _send(self, replica: Replica, name: str, arguments: Mapping[str, Any] | None) -> ToolResult:
+        replica.outstanding += 1
+        POOL_OUTSTANDING.labels(side=self.side, url=replica.url).inc()
+        call = asyncio.create_task(replica.workbench.call_tool(name, arguments))
+        replica.inflight.add(call)
+        try:
+            result = await asyncio.shield(call)
+        except asyncio.CancelledError:
+            call.cancel()
+            if asyncio.current_task().cancelling():
+                raise
+            # cancelled by _eject
+            result = None
+        except Exception as e:
+            log.warning(f"[{self.side} pool] {replica.url} raised {e!r}")
+            result = None
+        finally:
+            replica.inflight.discard(call)
+            replica.outstanding -= 1
+            POOL_OUTSTANDING.labels(side=self.side, url=replica.url).dec()
+        replica.served += 1
+        if result is not None and not result.is_error:
+            replica.failures = 0
+            POOL_REQUESTS.labels(side=self.side, url=replica.url, outcome="ok").inc()
+            return result
+
+        POOL_REQUESTS.labels(side=self.side, url=replica.url, outcome="error").inc()
+        replica.failures += 1
+        if replica.failures >= self.eject_after:
+            self._eject(replica, f"{replica.failures} consecutive errors")
+        return result or ToolResult(name=name, result=[], is_error=True)
+
+    def _eject(self, replica: Replica, reason: str) -> None:
+        if not replica.healthy:
+            return
+        replica.healthy = False
+        replica.ejections += 1
+        POOL_EJECTIONS.labels(side=self.side, url=replica.url).inc()
+        self._update_healthy()
+        for call in replica.inflight:
+            call.cancel()
+        log.warning(f"[{self.side} pool] ejected {replica.url}: {reason}")
+
+    async def _reconnect(self, replica: Replica) -> None:
+        try:
+            await asyncio.wait_for(replica.connect(), replica.timeout)
+        except Exception as e:
+            log.warning(f"[{self.side} pool] {replica.url} unreachable: {e!r}")
+            return
+        replica.healthy = True
+        replica.failures = 0
+        self._update_healthy()
+        log.info(f"[{self.side} pool] {replica.url} in rotation")
+
+    async def _probe(self, replica: Replica) -> None:
+        try:
+            await asyncio.wait_for(replica.workbench.list_tools(), self.health_timeout)
+        except Exception as e:
+            self._eject(replica, f"health check failed: {e!r}")
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_interval)
+            await asyncio.gather(*(self._probe(r) if r.healthy else self._reconnect(r) for r in self.replicas))
+
+    def _update_healthy(self) -> None:
+        healthy = sum(r.healthy for r in self.replicas)
+        POOL_HEALTHY.labels(side=self.side).set(healthy)
+        if healthy:
+            self._available.set()
+        else:
+            self._available.clear()
+
+    def stats(self) -> dict:
+        return {
+            r.url: {
+                "healthy": r.healthy,
+                "outstanding": r.outstanding,
+                "served": r.served,
+                "failures": r.failures,
+                "ejections": r.ejections,
+            }
+            for r in self.replicas
+        }
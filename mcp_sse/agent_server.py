@@ -0,0 +1,469 @@
+"""Color-agnostic chess agent (SSE transport): one process plays either side.
+
+Each request is answered for the side to move in its FEN. Both sides share
+one model client (one HTTP connection pool, one hedging history), the move
+cache, the opening book, the ponderer and the fast-path counters; each side
+keeps its own prompt and model conversations. AGENT_SIDES restricts the
+server to one color, which is all mcp_sse/white/white_agent.py and
+mcp_sse/black/black_agent.py do.
+
+Startup is split so the port answers early: only FastMCP and chess are
+imported before the server listens. The model stack (autogen, openai) is
+imported and the players are built in a background thread, then
+MODEL_WARM_CONNECTIONS connections per deployment are opened. /ready
+answers 503 until then and 200 afterwards, and /ready and /metrics report
+each phase's time since process start. Moves that arrive early wait for
+the warm-up.
+
+Besides `move` (a full FEN per call), the server speaks the session protocol
+of mcp_sse/sessions.py: `open_session`, then `session_move` with only the
+plies played since the previous call, then `close_session`. Sessions idle for
+SESSION_TTL seconds are dropped, together with their model context.
+
+Requests that carry a `traceparent` argument continue the orchestrator's
+trace: TRACE_FILE / TRACE_OTLP_ENDPOINT export an "agent.move" span per
+request with the pipeline phases and model calls below it (see
+mcp_sse/tracing.py).
+
+    FASTMCP_PORT=8000 uv run ./mcp_sse/agent_server.py
+    AGENT_URL=http://localhost:8000 uv run ./mcp_sse/board.py
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import chess
+import uvicorn
+from dotenv import load_dotenv
+from mcp.server.fastmcp import Context, FastMCP
+
+load_dotenv()
+
+# make the shared mcp_sse helpers importable when started as a plain script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mcp_sse.metrics import metrics_endpoint
+from mcp_sse.sessions import SessionError, SessionStore
+from mcp_sse.startup import Startup, prewarm
+from mcp_sse.tracing import SERVER, configure as configure_tracing, span
+
+if TYPE_CHECKING:
+    # the model stack is imported during warm-up, off the path to a listening port
+    from autogen_core.models import ChatCompletionClient
+    from mcp_sse.player import ChessPlayer
+
+log = logging.getLogger(__name__)
+
+# upper bound on concurrent model calls served by one `moves` batch
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", "8"))
+# model history scope: request | game | window (one game: concurrent moves take turns);
+# history capped to CONTEXT_WINDOW messages
+CONTEXT_POLICY = os.getenv("CONTEXT_POLICY", "request")
+CONTEXT_WINDOW = int(os.getenv("CONTEXT_WINDOW", "20"))
+# the prompt lists only the PROMPT_TOP_K statically best moves (0 lists all legal moves)
+PROMPT_TOP_K = int(os.getenv("PROMPT_TOP_K", "10"))
+# RANKED_CANDIDATES=N asks for N ranked moves per model call and plays the first legal one
+RANKED_CANDIDATES = int(os.getenv("RANKED_CANDIDATES", "0"))
+# connections opened per model deployment before the agent reports ready (0 skips pre-warming)
+MODEL_WARM_CONNECTIONS = int(os.getenv("MODEL_WARM_CONNECTIONS", "2"))
+# game sessions: dropped after SESSION_TTL idle seconds, least recently used beyond MAX_SESSIONS
+SESSION_TTL = float(os.getenv("SESSION_TTL", "600"))
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "1024"))
+# session prompts list the game's last PROMPT_HISTORY_PLIES moves (0 = none)
+PROMPT_HISTORY_PLIES = int(os.getenv("PROMPT_HISTORY_PLIES", "8"))
+# spans of each request, as JSON lines and/or OTLP/HTTP; requests without a traceparent are sampled at TRACE_SAMPLE
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_SAMPLE = float(os.getenv("TRACE_SAMPLE", "1.0"))
+MAX_NUMBER_OF_RETRIES = 5
+
+PROMPTS = {
+    chess.WHITE: dict(
+        name="white_player",
+        description="""You are a chess player, playing with WHITE pieces.
+                    Before you decide about a next move, you must analyze the current
+                    board state and provide a legal best move in UCI notation.
+                    Provide LEGAL MOVES in UCI notation only.
+                    Double check and reason about the selected move before sending it.
+                    Your goal is to win the game.""",
+        system_message="""You are world renowned chess grandmaster. You play WHITE.
+        Respond only with one legal UCI move (e.g. e2e4) for the given FEN.
+        You must output exactly ONE move in Universal Chess Interface (UCI) format:
+            • four characters like e2e4, or
+            • five if promotion, e.g. e7e8q
+            No capture symbol (x), no checks (+/#), no words. Output ONLY the move.
+        Double check the selected move is a valid and legal given current FEN!
+        Don't make stupid moves!
+        Follow those basic rules:
+            Prevents the most common blunder (self-check).
+            Avoids pointless sacrifices.
+            Stops discovered checks/loss of queen.
+            Reduces illegal “through-piece” moves.
+            Eliminates illegal backward-pawn or straight captures.
+            Your move must remove any check to your own king. If not, try again.
+        """,
+    ),
+    chess.BLACK: dict(
+        name="black_pieces_player",
+        description="""You are a chess player, playing with BLACK pieces.
+                    Before you decide about a next move, you must analyze the current
+                    board state and provide a legal best move in UCI notation.
+                    Provide LEGAL MOVES in UCI notation only.
+                    Double check and reason about the selected move before sending it.
+                    Your goal is to win the game.""",
+        system_message=
+        """
+            You are a world-renowned chess grandmaster. You play BLACK.
+            Respond only with one legal UCI move (e.g. e7e5) for the given FEN.
+            You must output exactly ONE move in Universal Chess Interface (UCI) format:
+                • four characters like e2e4, or
+                • five if promotion, e.g. e7e8q
+                No capture symbol (x), no checks (+/#), no words. Output ONLY the move.
+            Double-check the move is legal in the current position.
+            Do not make stupid moves!
+            Follow these basic rules:
+            • Prevent the most common blunder (self-check).
+            • Avoid pointless sacrifices.
+            • Stop discovered checks / loss of the queen.
+            • Bishops, rooks and queens cannot jump over pieces.
+            • Pawns never move backwards or capture straight ahead.
+            • Your move must remove any check to your own king. If not, try again.
+        """,
+    ),
+}
+
+
+def parse_sides(spec: str) -> list[chess.Color]:
+    """AGENT_SIDES ("white", "black" or "white,black") → colors."""
+    sides = []
+    for name in filter(None, (part.strip().lower() for part in spec.split(","))):
+        if name not in chess.COLOR_NAMES:
+            raise ValueError(f"unknown side {name!r} in AGENT_SIDES")
+        sides.append(chess.COLOR_NAMES.index(name) == 1)
+    return sides or [chess.WHITE, chess.BLACK]
+
+
+def create_model_client() -> "ChatCompletionClient":
+    """The Azure OpenAI client, rate limited per deployment and hedged when configured."""
+    from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
+
+    from mcp_sse.hedging import HedgedChatCompletionClient, parse_deployments
+    from mcp_sse.rate_limit import RateLimitedChatCompletionClient
+
+    # MODEL_RPM / MODEL_TPM: quota of each deployment, shared by every game this agent plays (0 = unlimited)
+    rpm = float(os.getenv("MODEL_RPM", "0"))
+    tpm = float(os.getenv("MODEL_TPM", "0"))
+
+    def deployment_client(deployment: str, endpoint: str | None, name: str) -> "ChatCompletionClient":
+        # behind a quota the 429s must reach RateLimitedChatCompletionClient (Retry-After pause, priority
+        # queue) instead of being retried inside the openai SDK with its own backoff
+        retries = {"max_retries": 0} if rpm or tpm else {}
+        client = AzureOpenAIChatCompletionClient(
+            model=os.getenv("AZURE_OPENAI_MODEL", "gpt-4o"),
+            azure_endpoint=endpoint or os.getenv("AZURE_OPENAI_ENDPOINT"),
+            azure_deployment=deployment,
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2025-01-01-preview"),
+            **retries,
+        )
+        if rpm or tpm:
+            client = RateLimitedChatCompletionClient(client, rpm=rpm, tpm=tpm, name=name)
+        return client
+
+    primary = os.getenv("AZURE_OPENAI_DEPLOYMENT", "gpt-4o")
+    client = deployment_client(primary, None, primary)
+    # MODEL_DEPLOYMENTS: alternate deployments that slow model calls are hedged to
+    deployments = parse_deployments(os.getenv("MODEL_DEPLOYMENTS", ""))
+    if not deployments:
+        return client
+    names = [f"{deployment}@{endpoint}" if endpoint else deployment for deployment, endpoint in deployments]
+    return HedgedChatCompletionClient(
+        client,
+        [deployment_client(deployment, endpoint, name)
+         for (deployment, endpoint), name in zip(deployments, names)],
+        names=[primary] + names,
+        percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+        initial_delay=float(os.getenv("HEDGE_INITIAL_DELAY", "10")),
+    )
+
+
+def create_players(sides: list[chess.Color]) -> dict[chess.Color, "ChessPlayer"]:
+    """One ChessPlayer per side, all sharing the model client, cache, book, ponderer and fast paths."""
+    from mcp_sse.fast_paths import FastPaths
+    from mcp_sse.move_cache import MoveCache
+    from mcp_sse.opening_book import open_book
+    from mcp_sse.player import ChessPlayer
+    from mcp_sse.ponder import Ponderer
+
+    client = create_model_client()
+    # positions already answered (across games) are served without a model call
+    move_cache = MoveCache(int(os.getenv("MOVE_CACHE_SIZE", "4096")))
+    # memory-mapped Polyglot book consulted before the cache and the model
+    opening_book = open_book(os.getenv("BOOK_PATH", "opening_book.bin"))
+    # PONDER=1 precomputes answers to the opponent's PONDER_WIDTH likeliest replies
+    ponderer = Ponderer(width=int(os.getenv("PONDER_WIDTH", "2"))) if os.getenv("PONDER", "0") == "1" else None
+    # forced moves, mates in one and winning recaptures skip the model (FAST_PATHS=0 disables)
+    fast_paths = FastPaths() if os.getenv("FAST_PATHS", "1") == "1" else None
+    return {
+        color: ChessPlayer(
+            color,
+            client,
+            **PROMPTS[color],
+            max_retries=MAX_NUMBER_OF_RETRIES,
+            cache=move_cache,
+            book=opening_book,
+            ponderer=ponderer,
+            fast_paths=fast_paths,
+            context_policy=CONTEXT_POLICY,
+            context_window=CONTEXT_WINDOW,
+            top_k=PROMPT_TOP_K,
+            candidates=RANKED_CANDIDATES,
+            history_plies=PROMPT_HISTORY_PLIES)
+        for color in sides
+    }
+
+
+def side_to_move(fen: str) -> chess.Color | None:
+    fields = fen.split()
+    if len(fields) < 2 or fields[1] not in ("w", "b"):
+        return None
+    return fields[1] == "w"
+
+
+class AgentServer:
+    """FastMCP app whose `move` / `moves` tools answer for whichever of `sides` is to move."""
+
+    def __init__(self, sides: list[chess.Color]):
+        self.sides = sides
+        self.players: dict[chess.Color, "ChessPlayer"] = {}
+        self.startup = Startup()
+        self.sessions = SessionStore(SESSION_TTL, MAX_SESSIONS, on_close=self.forget_game)
+        self._warming: asyncio.Task | None = None
+        names = " or ".join(chess.COLOR_NAMES[color].upper() for color in sides)
+        title = "Chess Agent" if len(sides) > 1 else f"{chess.COLOR_NAMES[sides[0]].title()} Chess Agent"
+
+        self.mcp = mcp = FastMCP(name=title,
+                                 description=f"{title} ({names}) using SSE transport",
+                                 base_url="http://localhost:8000",
+                                 describe_all_responses=True,
+                                 describe_full_response_schema=True)
+
+        @mcp.tool(
+            name="move",
+            description=f"Return a legal move in UCI for the side to move ({names}) in the provided FEN. "
+                        "Pass the same game_id for every move of a game to scope the model context to that game, "
+                        "and the opponent's last move (UCI) as last_move to enable the recapture shortcut. "
+                        "With deadline_ms the answer arrives within that many milliseconds, "
+                        "falling back to a locally chosen move if the model is too slow. "
+                        "traceparent (W3C) makes the request part of the caller's trace.",
+        )
+        async def move_tool(fen: str, game_id: str | None = None, last_move: str | None = None,
+                            deadline_ms: int | None = None, traceparent: str | None = None):
+            """Return one legal move (UCI) for the side to move."""
+            with span("agent.move", parent=traceparent, kind=SERVER, game_id=game_id,
+                      deadline_ms=deadline_ms) as request:
+                player = await self.player_for(fen)
+                request.set(side=player.side)
+                result = await player.choose_move(fen, game_id=game_id, last_move=last_move, deadline_ms=deadline_ms)
+                request.set(**result)
+                return result
+
+        @mcp.tool(
+            name="moves",
+            description=f"Return a legal move in UCI for the side to move ({names}) in each FEN in the list. "
+                        "Positions are answered concurrently; each result is also streamed "
+                        "as a log notification as soon as it is ready.",
+        )
+        async def moves_tool(fens: list[str], ctx: Context):
+            """Return one result per FEN, in input order: {"fen", "uci"} or {"fen", "error"}."""
+            players = await self.warmed()
+            results: list[dict | None] = [None] * len(fens)
+            done = 0
+            # each side's positions go through that side's player, both batches run at once;
+            # FENs for neither side go to the first player, which rejects them
+            batches: dict[chess.Color, list[int]] = {color: [] for color in players}
+            for i, fen in enumerate(fens):
+                side = side_to_move(fen)
+                batches[side if side in players else sides[0]].append(i)
+
+            async def batch(color: chess.Color, indices: list[int]):
+                async for position, result in players[color].choose_moves([fens[i] for i in indices],
+                                                                         max_in_flight=MAX_IN_FLIGHT):
+                    yield indices[position], result
+
+            async for index, result in merge(*(batch(color, indices) for color, indices in batches.items()
+                                               if indices)):
+                results[index] = {"fen": fens[index], **result}
+                done += 1
+                await ctx.info(json.dumps({"index": index, **results[index]}))
+                await ctx.report_progress(done, len(fens))
+            return results
+
+        @mcp.tool(
+            name="open_session",
+            description=f"Open a game session for {names}: the agent keeps the board, so each later "
+                        "session_move only sends the plies played since the previous call. Starts from fen "
+                        "(default: the initial position) after moves (UCI). Returns session_id and ply.",
+        )
+        async def open_session_tool(moves: list[str] | None = None, fen: str | None = None,
+                                    traceparent: str | None = None):
+            """Open a session; {"session_id", "ply"} or {"error"}."""
+            with span("agent.open_session", parent=traceparent, kind=SERVER, plies=len(moves or [])) as request:
+                try:
+                    session = self.sessions.open(fen, moves)
+                except SessionError as e:
+                    request.fail(str(e))
+                    return {"error": str(e)}
+                return {"session_id": session.session_id, "ply": session.board.ply()}
+
+        @mcp.tool(
+            name="session_move",
+            description="Apply moves (UCI, the plies played since the previous call of this session) to the "
+                        "session's board and return a legal move in UCI for the side to move. ply is the ply "
+                        "count after those moves; on a mismatch the session is closed and the answer carries "
+                        '"resync": true, so reopen it. deadline_ms and traceparent work as for move.',
+        )
+        async def session_move_tool(session_id: str, moves: list[str] | None = None, ply: int | None = None,
+                                    deadline_ms: int | None = None, traceparent: str | None = None):
+            """Return one legal move (UCI) for the side to move in the session's game."""
+            with span("agent.session_move", parent=traceparent, kind=SERVER, session_id=session_id, ply=ply,
+                      deadline_ms=deadline_ms) as request:
+                try:
+                    session = self.sessions.get(session_id)
+                except SessionError as e:
+                    request.fail(str(e))
+                    return {"error": str(e), "resync": True}
+                async with session.lock:
+                    try:
+                        session.apply(moves or [], ply)
+                    except SessionError as e:
+                        self.sessions.resync(session_id)
+                        request.fail(str(e))
+                        return {"error": str(e), "resync": True}
+                    players = await self.warmed()
+                    player = players.get(session.board.turn) or next(iter(players.values()))
+                    request.set(side=player.side)
+                    result = await player.choose_board_move(session.board, game_id=session_id,
+                                                            deadline_ms=deadline_ms)
+                    request.set(**result)
+                    return result
+
+        @mcp.tool(
+            name="close_session",
+            description="Close a game session once the game is over.",
+        )
+        async def close_session_tool(session_id: str):
+            """{"closed": true} if the session was open."""
+            return {"closed": self.sessions.close(session_id)}
+
+        @mcp.tool(
+            name="stats",
+            description="Return the agent's model, move cache, opening book, ponder and fast-path counters "
+                        "(per side when the agent plays both).",
+        )
+        async def stats_tool():
+            """Shortcut and model-call counters."""
+            players = await self.warmed()
+            stats = {chess.COLOR_NAMES[color]: {**player.stats(), "sessions": self.sessions.stats()}
+                     for color, player in players.items()}
+            return next(iter(stats.values())) if len(stats) == 1 else stats
+
+        # Prometheus scrape endpoint and readiness probe next to /sse on the same port
+        mcp.custom_route("/metrics", methods=["GET"])(metrics_endpoint)
+        mcp.custom_route("/ready", methods=["GET"])(self.startup.endpoint)
+
+    async def warm_up(self) -> None:
+        """Import the model stack and build the players off the event loop, then pre-warm connections."""
+        self.players = await asyncio.to_thread(create_players, self.sides)
+        self.startup.mark("players")
+        if MODEL_WARM_CONNECTIONS:
+            client = next(iter(self.players.values())).model_client
+            if await prewarm(client, MODEL_WARM_CONNECTIONS):
+                self.startup.mark("connections")
+            else:
+                log.warning("No model deployment answered the pre-warm requests; moves will connect lazily")
+        self.startup.set_ready()
+
+    async def warmed(self) -> dict[chess.Color, "ChessPlayer"]:
+        """The players, once warm-up is done (starting it if nothing has)."""
+        warming = self._warming
+        # a cancelled warm-up (shutdown) is retried like a failed one; .exception() would raise on it
+        if warming is None or (warming.done() and (warming.cancelled() or warming.exception() is not None)):
+            self._warming = asyncio.create_task(self.warm_up())
+        await asyncio.shield(self._warming)
+        return self.players
+
+    def forget_game(self, game_id: str) -> None:
+        """Drop a closed session's model context."""
+        for player in self.players.values():
+            player.contexts.forget(game_id)
+
+    async def player_for(self, fen: str) -> "ChessPlayer":
+        players = await self.warmed()
+        # no player for this side: let any of them reject the FEN with its usual error
+        return players.get(side_to_move(fen)) or next(iter(players.values()))
+
+    async def serve(self) -> None:
+        """Listen right away and warm up in the background."""
+        self._warming = asyncio.create_task(self.warm_up())
+        # FastMCP.run_sse_async, keeping the uvicorn server to see when the port is bound
+        settings = self.mcp.settings
+        server = uvicorn.Server(uvicorn.Config(self.mcp.sse_app(), host=settings.host, port=settings.port,
+                                               log_level=settings.log_level.lower()))
+        listening = asyncio.create_task(self._mark_listening(server))
+        try:
+            await server.serve()
+        finally:
+            listening.cancel()
+
+    async def _mark_listening(self, server: uvicorn.Server) -> None:
+        while not server.started:
+            await asyncio.sleep(0.005)
+        self.startup.mark("server")
+
+    def run(self) -> None:
+        # here rather than in __main__ so the per-color wrappers export spans too
+        configure_tracing("chess-agent", TRACE_FILE, TRACE_OTLP_ENDPOINT, TRACE_SAMPLE)
+        asyncio.run(self.serve())
+
+
+def create_server(sides: list[chess.Color]) -> AgentServer:
+    return AgentServer(sides)
+
+
+async def merge(*streams):
+    """Yield items from several async iterators as they arrive."""
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def drain(stream):
+        try:
+            async for item in stream:
+                await queue.put(item)
+        finally:
+            await queue.put(finished)
+
+    tasks = [asyncio.create_task(drain(stream)) for stream in streams]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is finished:
+                remaining -= 1
+            else:
+                yield item
+        for task in tasks:
+            # surface errors raised inside a stream
+            task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[ChessAgent] %(message)s")
+    server = create_server(parse_sides(os.getenv("AGENT_SIDES", "white,black")))
+    log.info("Starting %s...", server.mcp.name)
+    server.run()
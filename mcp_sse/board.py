@@ -2,22 +2,76 @@
 """
 SSE-based orchestrator for a two-engine chess game:
 
-  • Connects to white_agent_sse.py and black_agent_sse.py via HTTP/SSE
+  • Connects to white_agent_sse.py and black_agent_sse.py via HTTP/SSE,
+    optionally to several replicas per side (WHITE_URLS / BLACK_URLS)
+    with least-outstanding routing, see mcp_sse/agent_pool.py; AGENT_URL
+    points both sides at one color-agnostic mcp_sse/agent_server.py
   • Calls their `move` tool alternately, validates the moves,
     maintains a python-chess board, renders a tiny GUI,
     and logs all events.
+  • Tournament mode (GAMES=N, MAX_CONCURRENT_GAMES=M) plays N headless
+    games over the same two SSE sessions, at most M of them at a time,
+    and reports games/hour.
+  • HEADLESS=1 never imports the GUI; PLY_DELAY / ERROR_DELAY (seconds)
+    set the pause after each ply and after an agent error. Both default
+    to 0 without a window.
+  • Prometheus-style metrics (move latency per side, invalid replies,
+    plies, games) are served at http://localhost:METRICS_PORT/metrics.
+  • Spectators follow every game live at http://localhost:METRICS_PORT/events
+    (Server-Sent Events: start, ply, error and end events, ?game=<name> for
+    one game; see mcp_sse/spectator.py). Slow viewers are dropped rather
+    than slowing the games down.
+  • Time controls (off unless set): MOVE_TIME seconds per move and
+    GAME_TIME seconds per side. Agents get the deadline with each request;
+    a move that is not in by then is chosen locally, and an exhausted clock
+    loses on time. Without them a game whose agent keeps failing is
+    abandoned, and stays in the journal to be resumed.
+  • Every ply is journaled to GAME_LOG (see mcp_sse/game_log.py) and each
+    finished game is appended to game_record.pgn. A restarted orchestrator
+    resumes the games the journal shows unfinished from their last position,
+    clocks included, without asking the agents about earlier plies.
+  • AGENT_SESSIONS=1 plays over agent-side game sessions (see
+    mcp_sse/sessions.py): each request carries only the plies played since
+    that side's previous request instead of the full FEN.
+  • Adjudication (ADJUDICATE_*, see mcp_sse/adjudication.py) ends decided
+    games early: a material lead held for N plies, no progress, repetition
+    or a ply cap. The PGN gets Termination "adjudication" and the reason.
+  • TRACE_FILE / TRACE_OTLP_ENDPOINT trace every ply (see
+    mcp_sse/tracing.py): agent calls, MCP round-trips, validation and the
+    agents' own phases and model calls end up in one trace per ply.
 
 Requires:
  uv add autogen-agentchat autogen-ext[openai,mcp] python-chess chess-board rich
 """
 import asyncio
 import json
+import math
 import os
 import logging
+import socket
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import Callable
 import chess
 import chess.pgn
-from chessboard import display
-from autogen_ext.tools.mcp import McpWorkbench, SseServerParams
+import uvicorn
+from autogen_ext.tools.mcp import McpWorkbench
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+# make the shared mcp_sse helpers importable when started as a plain script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mcp_sse.adjudication import Adjudicator
+from mcp_sse.agent_pool import AgentPool
+from mcp_sse.evaluator import best_move
+from mcp_sse.game_log import GameLog, JournaledGame, append_pgn, plan_rounds, unfinished
+from mcp_sse.game_state import GameState
+from mcp_sse.gui import make_renderer
+from mcp_sse.metrics import counter, gauge, histogram, metrics_endpoint, timed
+from mcp_sse.spectator import EventHub
+from mcp_sse.tracing import configure as configure_tracing, span, traced
 
 # configure logging
 logging.basicConfig(
@@ -27,107 +81,532 @@ logging.basicConfig(
 )
 log = logging.getLogger("board")
 
-# endpoints for SSE agents
+# endpoints for SSE agents; WHITE_URLS / BLACK_URLS (comma separated) list several replicas per side,
+# AGENT_URLS points both sides at color-agnostic agents (mcp_sse/agent_server.py)
+AGENT_URLS = os.getenv("AGENT_URLS", os.getenv("AGENT_URL", ""))
 WHITE_URL = os.getenv("WHITE_URL", "http://localhost:8001")
 BLACK_URL = os.getenv("BLACK_URL", "http://localhost:8002")
+WHITE_URLS = [u.strip() for u in os.getenv("WHITE_URLS", AGENT_URLS or WHITE_URL).split(",") if u.strip()]
+BLACK_URLS = [u.strip() for u in os.getenv("BLACK_URLS", AGENT_URLS or BLACK_URL).split(",") if u.strip()]
 
-async def run() -> None:
-    board = chess.Board()
-    
-    # initialize UI with the starting FEN
-    game_board = display.start(board.fen())
-
-    # configure SSE workbenches
-    wb_white = McpWorkbench(
-        SseServerParams(url=f"{WHITE_URL}/sse", timeout=90)
-    )
-    wb_black = McpWorkbench(
-        SseServerParams(url=f"{BLACK_URL}/sse", timeout=90)
-    )
-
-    async with wb_white, wb_black:
-        current_wb, current_name = wb_white, "white"
-        other_wb, other_name     = wb_black, "black"
-        max_invalid = 50
-        invalid_count = 0
-
-        while not board.is_game_over():
-            fen = board.fen()
-            log.info(f"Requesting {current_name} move. FEN={fen}")
-
-            # call the remote move tool
-            result = await current_wb.call_tool("move", {"fen": fen})
-            # parse SSE chunked response
-            content = result.result[0].content
-            print("Current move is :", content)
-            if not content or 'uci' not in content:
-                invalid_count += 1
-                log.warning(f"{current_name} agent error ({invalid_count}/{max_invalid}): {content}")
-                if invalid_count <= max_invalid:
-                    await asyncio.sleep(1)
-                    continue
-                else:
-                    log.error("Too many invalid moves; aborting game.")
-                    break
-            invalid_count = 0
-                
-            try:
-                payload = json.loads(content)
-            except json.JSONDecodeError:
-                log.error(f"Fatal Error: Invalid JSON from {current_name}: {content}")
-                break
+GAME_RECORD = "game_record.pgn"
 
-            if not payload or 'uci' not in payload:
-                invalid_count += 1
-                log.warning(f"{current_name} agent error ({invalid_count}/{max_invalid}): {payload}")
-                if invalid_count >= max_invalid:
-                    log.error("Too many invalid moves; aborting game.")
-                    break
+# append-only per-ply journal of the games in progress ("" disables it, and with it resuming);
+# fsync after GAME_LOG_FSYNC_EVERY records or GAME_LOG_FSYNC_SECONDS, and at every game end
+GAME_LOG = os.getenv("GAME_LOG", "game_log.jsonl")
+GAME_LOG_FSYNC_EVERY = int(os.getenv("GAME_LOG_FSYNC_EVERY", "32"))
+GAME_LOG_FSYNC_SECONDS = float(os.getenv("GAME_LOG_FSYNC_SECONDS", "1"))
+
+# tournament mode: number of games and how many of them may be in flight at once
+GAMES = int(os.getenv("GAMES", "1"))
+MAX_CONCURRENT_GAMES = int(os.getenv("MAX_CONCURRENT_GAMES", "4"))
+
+# headless runs skip the GUI entirely; pacing only matters when someone watches
+HEADLESS = os.getenv("HEADLESS", "0") == "1" or GAMES > 1
+PLY_DELAY = float(os.getenv("PLY_DELAY", "0" if HEADLESS else "2"))
+ERROR_DELAY = float(os.getenv("ERROR_DELAY", "0" if HEADLESS else "1"))
+
+# time controls in seconds: per move and per side per game (0 = unlimited, the default); MOVE_MARGIN of
+# each move deadline is left for the agent's answer to travel back
+MOVE_TIME = float(os.getenv("MOVE_TIME", "0"))
+GAME_TIME = float(os.getenv("GAME_TIME", "0"))
+MOVE_MARGIN = float(os.getenv("MOVE_MARGIN", "1"))
+
+# adjudication, each rule off at 0: a lead of ADJUDICATE_MATERIAL centipawns held for ADJUDICATE_MATERIAL_PLIES
+# plies wins; ADJUDICATE_NO_PROGRESS_PLIES plies without capture or pawn move, a position repeated
+# ADJUDICATE_REPETITIONS times or ADJUDICATE_MAX_PLIES plies draw
+ADJUDICATE_MATERIAL = int(os.getenv("ADJUDICATE_MATERIAL", "0"))
+ADJUDICATE_MATERIAL_PLIES = int(os.getenv("ADJUDICATE_MATERIAL_PLIES", "10"))
+ADJUDICATE_NO_PROGRESS_PLIES = int(os.getenv("ADJUDICATE_NO_PROGRESS_PLIES", "0"))
+ADJUDICATE_REPETITIONS = int(os.getenv("ADJUDICATE_REPETITIONS", "0"))
+ADJUDICATE_MAX_PLIES = int(os.getenv("ADJUDICATE_MAX_PLIES", "0"))
+
+# AGENT_SESSIONS=1 sends agents move deltas within a game session instead of a FEN per move
+AGENT_SESSIONS = os.getenv("AGENT_SESSIONS", "0") == "1"
+
+# HTTP port for /metrics and /events (0 disables both), on loopback unless METRICS_HOST says otherwise;
+# a port already in use only costs the metrics, never the games
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9000"))
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# events a spectator may fall behind before it is dropped
+SPECTATOR_QUEUE = int(os.getenv("SPECTATOR_QUEUE", "256"))
+# per-ply traces: JSON lines to TRACE_FILE and/or OTLP/HTTP to TRACE_OTLP_ENDPOINT, TRACE_SAMPLE of the plies
+TRACE_FILE = os.getenv("TRACE_FILE", "")
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+TRACE_SAMPLE = float(os.getenv("TRACE_SAMPLE", "1.0"))
+
+MOVE_SECONDS = histogram("chess_board_move_seconds", "Round-trip of one move tool call", ["side"])
+PHASE_SECONDS = histogram("chess_board_phase_seconds", "Time per orchestrator phase of a ply", ["phase"])
+INVALID_REPLIES = counter("chess_board_invalid_replies_total", "Agent replies without a usable move", ["side"])
+PLIES = counter("chess_board_plies_total", "Plies applied to a board")
+GAMES_FINISHED = counter("chess_board_games_total", "Finished games", ["result"])
+FALLBACK_MOVES = counter("chess_board_fallback_moves_total", "Moves the orchestrator chose itself", ["side", "reason"])
+FORFEITS = counter("chess_board_time_forfeits_total", "Games lost on time", ["side"])
+ADJUDICATIONS = counter("chess_board_adjudications_total", "Games ended by adjudication", ["rule"])
+GAMES_IN_FLIGHT = gauge("chess_board_games_in_flight", "Games currently being played")
+GAME_SECONDS = histogram("chess_board_game_seconds", "Wall time of a whole game",
+                         buckets=(60, 300, 600, 1200, 1800, 3600, 7200, 14400))
+
+# per-ply game events for the /events stream
+EVENTS = EventHub(SPECTATOR_QUEUE)
+
+
+def parse_move(board: chess.Board, result) -> tuple[chess.Move | None, str]:
+    """The legal move in a `move` tool result, or (None, what was wrong with it)."""
+    content = result.result[0].content if result.result else ""
+    if not content or 'uci' not in content:
+        return None, content or "empty reply"
+    try:
+        payload = json.loads(content)
+    except json.JSONDecodeError:
+        return None, f"invalid JSON: {content}"
+    uci = payload.get("uci") if isinstance(payload, dict) else None
+    with traced("validate", PHASE_SECONDS, phase="validate"):
+        try:
+            mv = chess.Move.from_uci(uci)
+        except (TypeError, ValueError):
+            return None, f"malformed move {uci!r}"
+        if mv not in board.legal_moves:
+            return None, f"illegal move {uci}"
+    if isinstance(payload, dict) and payload.get("fallback"):
+        log.info(f"Agent answered {uci} with its {payload['fallback']} fallback")
+    return mv, ""
+
+
+def tool_payload(result) -> dict:
+    """The JSON object in a tool result, or {} if there is none."""
+    try:
+        payload = json.loads(result.result[0].content)
+    except (IndexError, AttributeError, TypeError, ValueError):
+        return {}
+    return payload if isinstance(payload, dict) else {}
+
+
+class MoveSession:
+    """One side's game session on its agent: requests carry only the plies the agent has not seen.
+
+    Opened on the first request with the moves so far and pinned to the replica
+    that opened it. When the agent asks to resync (session expired, a reply was
+    lost, the replica went away) it is reopened from the full move list once;
+    agents without sessions get the plain `move` call.
+    """
+
+    def __init__(self, workbench: AgentPool | McpWorkbench):
+        self.workbench = workbench
+        self.session_id: str | None = None
+        # replica holding the session, when the workbench is a pool
+        self.url: str | None = None
+        # plies already on the agent's board
+        self.seen = 0
+        self.supported = True
+
+    async def _open(self, board: chess.Board) -> None:
+        moves = [m.uci() for m in board.move_stack]
+        if isinstance(self.workbench, AgentPool):
+            self.url, reply = await self.workbench.call_routed("open_session", {"moves": moves})
+        else:
+            reply = await self.workbench.call_tool("open_session", {"moves": moves})
+        self.session_id = tool_payload(reply).get("session_id")
+        self.seen = len(moves)
+        if self.session_id is None and "Unknown tool" in str(reply.result):
+            log.warning("Agent has no game sessions; sending FENs")
+            self.supported = False
+
+    async def _session_call(self, name: str, args: dict):
+        if isinstance(self.workbench, AgentPool):
+            return await self.workbench.call_on(self.url, name, args)
+        return await self.workbench.call_tool(name, args)
+
+    async def move(self, board: chess.Board, args: dict):
+        """The agent's reply for `board`; `args` are the plain `move` arguments (FEN, deadline…)."""
+        for _ in range(2):
+            if self.supported and self.session_id is None:
+                await self._open(board)
+            if self.session_id is None:
+                break
+            request = {"session_id": self.session_id,
+                       "moves": [m.uci() for m in board.move_stack[self.seen:]],
+                       "ply": board.ply()}
+            if "deadline_ms" in args:
+                request["deadline_ms"] = args["deadline_ms"]
+            reply = await self._session_call("session_move", request)
+            if reply.is_error or tool_payload(reply).get("resync"):
+                log.info(f"Reopening game session {self.session_id}: {tool_payload(reply).get('error', 'no reply')}")
+                self.session_id = None
                 continue
-            
-            invalid_count = 0
-            uci = payload['uci']
-            log.info(f"Received UCI from {current_name}: {uci}")
+            self.seen = board.ply()
+            return reply
+        return await self.workbench.call_tool("move", args)
 
-            # validate move
+    async def close(self) -> None:
+        if self.session_id is not None:
             try:
-                mv = chess.Move.from_uci(uci)
-                if mv not in board.legal_moves:
-                    raise ValueError("illegal move")
+                await self._session_call("close_session", {"session_id": self.session_id})
             except Exception as e:
-                log.error(f"Illegal move from {current_name}: {uci} ({e})")
+                log.debug(f"Closing game session {self.session_id} failed: {e!r}")
+            self.session_id = None
+
+
+def make_adjudicator() -> Adjudicator:
+    """A fresh set of the configured adjudication rules for one game."""
+    return Adjudicator(material=ADJUDICATE_MATERIAL,
+                       material_plies=ADJUDICATE_MATERIAL_PLIES,
+                       no_progress_plies=ADJUDICATE_NO_PROGRESS_PLIES,
+                       repetitions=ADJUDICATE_REPETITIONS,
+                       max_plies=ADJUDICATE_MAX_PLIES)
+
+
+def fallback_move(board: chess.Board) -> chess.Move:
+    """The orchestrator's own move when an agent has none in time: the static evaluator's best."""
+    return best_move(board)
+
+
+def time_forfeit(board: chess.Board, flagged: chess.Color) -> str:
+    """Result when `flagged` runs out of time: a loss, or a draw if the opponent cannot mate."""
+    if board.has_insufficient_material(not flagged):
+        return "1/2-1/2"
+    return "0-1" if flagged == chess.WHITE else "1-0"
+
+
+async def play_game(wb_white: AgentPool | McpWorkbench,
+                    wb_black: AgentPool | McpWorkbench,
+                    name: str = "game",
+                    on_move: Callable[[chess.Board], None] | None = None,
+                    journal: GameLog | None = None,
+                    resume: JournaledGame | None = None,
+                    headers: dict[str, str] | None = None) -> chess.pgn.Game:
+    """Play one game between two (possibly shared) workbenches and return its PGN record.
+
+    The workbenches must already be started; several games may share them at once.
+    With time controls set, each move gets at most MOVE_TIME seconds and each
+    side GAME_TIME seconds in total; the agent is told its deadline, and a move
+    that does not arrive in time is replaced by `fallback_move`. A side whose
+    game clock runs out loses on time, so a game's thinking time is bounded by
+    2 × GAME_TIME. Without them, an agent that keeps failing abandons the game
+    (Result "*", no journal end record, so it can be resumed).
+
+    Every ply goes to `journal`. With `resume` the game continues from the
+    journaled moves and clocks under its old id and time control; `headers`
+    (e.g. Round) are journaled with the start and end up in the PGN.
+    """
+    move_time, game_time = MOVE_TIME, GAME_TIME
+    workbenches = {chess.WHITE: wb_white, chess.BLACK: wb_black}
+    sessions = {color: MoveSession(wb) for color, wb in workbenches.items()} if AGENT_SESSIONS else None
+    if resume is None:
+        state = GameState()
+        game_id = uuid.uuid4().hex  # lets the agents scope model context per game
+        clocks = {chess.WHITE: game_time or math.inf, chess.BLACK: game_time or math.inf}
+        headers = dict(headers or {})
+        if journal:
+            await journal.start(game_id, name, headers, {"move": move_time, "game": game_time})
+    else:
+        state = GameState(resume.board())
+        game_id, name, headers = resume.game_id, resume.name, {**resume.headers, **(headers or {})}
+        # the game keeps the time control it started with, whatever the environment says now
+        if resume.time_control:
+            move_time = resume.time_control.get("move", move_time)
+            game_time = resume.time_control.get("game", game_time)
+        white_clock, black_clock = resume.clocks or (game_time or math.inf, game_time or math.inf)
+        clocks = {chess.WHITE: white_clock, chess.BLACK: black_clock}
+        log.info(f"[{name}] Resuming after {state.board.ply()} plies from the journal. FEN={state.board.fen()}")
+        if on_move:
+            on_move(state.board)
+    # repetition and move-rule checks are incremental, see mcp_sse/game_state.py
+    board = state.board
+    adjudicator = make_adjudicator()
+    max_invalid = 50
+    result, termination, adjudicated = None, "normal", ""
+    started = time.perf_counter()
+    GAMES_IN_FLIGHT.inc()
+    finished = False
+    try:
+        EVENTS.publish("start", name, game_id=game_id, fen=board.fen(), ply=board.ply(),
+                       clocks=[clocks[chess.WHITE], clocks[chess.BLACK]])
+
+        while True:
+            with timed(PHASE_SECONDS, phase="game_over_check"):
+                if state.is_game_over():
+                    break
+                verdict = adjudicator.check(state) if adjudicator.enabled else None
+            if verdict is not None:
+                result, rule, adjudicated = verdict
+                termination = "adjudication"
+                ADJUDICATIONS.labels(rule=rule).inc()
+                log.info(f"[{name}] Adjudicated {result}: {adjudicated}")
                 break
+            side = board.turn
+            current_name = chess.COLOR_NAMES[side]
+            # one trace per ply, down to the agent's model calls (see mcp_sse/tracing.py)
+            with span("ply", game=name, game_id=game_id, ply=board.ply() + 1, side=current_name) as ply_span:
+                fen = board.fen()
+                budget = min(move_time or math.inf, clocks[side])
+                log.info(f"[{name}] Requesting {current_name} move. FEN={fen} "
+                         f"(budget {budget:.1f}s, clock {clocks[side]:.1f}s)")
+
+                # ask the agent until it gives a legal move, the move budget is spent or it keeps failing
+                move_started = time.perf_counter()
+                mv, invalid_count = None, 0
+                while mv is None and invalid_count < max_invalid:
+                    remaining = budget - (time.perf_counter() - move_started)
+                    if remaining <= 0:
+                        break
+                    args = {"fen": fen, "game_id": game_id}
+                    if board.move_stack:
+                        args["last_move"] = board.peek().uci()
+                    if remaining != math.inf:
+                        # leave the agent MOVE_MARGIN to get its answer back to us
+                        args["deadline_ms"] = int(max(0.0, remaining - MOVE_MARGIN) * 1000)
+                    try:
+                        with timed(MOVE_SECONDS, side=current_name), \
+                                span("agent_call", attempt=invalid_count + 1, deadline_ms=args.get("deadline_ms")):
+                            call = (sessions[side].move(board, args) if sessions
+                                    else workbenches[side].call_tool("move", args))
+                            reply = await asyncio.wait_for(call, None if remaining == math.inf else remaining)
+                    except asyncio.TimeoutError:
+                        log.warning(f"[{name}] {current_name} agent missed its deadline")
+                        EVENTS.publish("error", name, ply=board.ply(), side=current_name, error="missed its deadline")
+                        break
+                    mv, problem = parse_move(board, reply)
+                    if mv is None:
+                        INVALID_REPLIES.labels(side=current_name).inc()
+                        invalid_count += 1
+                        log.warning(f"[{name}] {current_name} agent error ({invalid_count}/{max_invalid}): {problem}")
+                        EVENTS.publish("error", name, ply=board.ply(), side=current_name, error=problem,
+                                       attempt=invalid_count)
+                        if ERROR_DELAY:
+                            left = budget - (time.perf_counter() - move_started)
+                            await asyncio.sleep(min(ERROR_DELAY, max(0.0, left)))
+                move_seconds = time.perf_counter() - move_started
+                clocks[side] -= move_seconds
+                source = "agent"
+
+                if mv is None:
+                    if clocks[side] <= 0:
+                        result, termination = time_forfeit(board, side), "time forfeit"
+                        FORFEITS.labels(side=current_name).inc()
+                        log.warning(f"[{name}] {current_name} lost on time")
+                        ply_span.set(invalid_replies=invalid_count, result=result)
+                        break
+                    if not (move_time or game_time):
+                        # no clock to protect: an agent that keeps failing stops the game, as it always did
+                        termination = "abandoned"
+                        log.error(f"[{name}] Too many invalid replies from {current_name}; abandoning the game")
+                        ply_span.set(invalid_replies=invalid_count, result="*")
+                        break
+                    reason = "deadline" if invalid_count < max_invalid else "invalid"
+                    with span("fallback", reason=reason):
+                        mv = fallback_move(board)
+                    source = f"fallback ({reason})"
+                    FALLBACK_MOVES.labels(side=current_name, reason=reason).inc()
+                    log.warning(f"[{name}] No move from {current_name} ({reason}); playing fallback {mv.uci()}")
+                log.info(f"[{name}] Received UCI from {current_name}: {mv.uci()}")
+                ply_span.set(uci=mv.uci(), source=source, invalid_replies=invalid_count)
+
+                # apply, publish and render; SAN only costs something while someone watches
+                san = board.san(mv) if len(EVENTS) else None
+                with span("apply"):
+                    state.push(mv)
+                    PLIES.inc()
+                    if journal:
+                        journal.ply(game_id, board.ply(), mv.uci(), [clocks[chess.WHITE], clocks[chess.BLACK]])
+                EVENTS.publish("ply", name, ply=board.ply(), side=current_name, uci=mv.uci(), san=san, fen=board.fen(),
+                               seconds=round(move_seconds, 3), clocks=[round(clocks[chess.WHITE], 3),
+                                                                       round(clocks[chess.BLACK], 3)],
+                               source=source)
+                if on_move:
+                    with traced("render", PHASE_SECONDS, phase="render"):
+                        on_move(board)
+                log.info(f"[{name}] Applied move {mv.uci()}")
+
+            if PLY_DELAY:
+                await asyncio.sleep(PLY_DELAY)
+
+        game = chess.pgn.Game.from_board(board)
+        for key, value in headers.items():
+            game.headers[key] = value
+        if result is not None:
+            game.headers["Result"] = result
+        if adjudicated:
+            game.end().comment = f"Adjudicated: {adjudicated}"
+        game.headers["Termination"] = termination
+        if game_time:
+            game.headers["TimeControl"] = f"{game_time:g}"
+
+        ending = adjudicated or {"time forfeit": "Time forfeit", "abandoned": "Abandoned"}.get(termination)
+        ending = ending or state.reason()
+        if journal and termination != "abandoned":
+            await journal.end(game_id, game.headers["Result"], termination)
+        EVENTS.publish("end", name, result=game.headers["Result"], termination=termination, reason=ending,
+                       plies=board.ply(), seconds=round(time.perf_counter() - started, 3))
+        GAME_SECONDS.observe(time.perf_counter() - started)
+        GAMES_FINISHED.labels(result=game.headers["Result"]).inc()
+        log.info(f"[{name}] Game over: {game.headers['Result']} - {ending}")
+        finished = True
+        return game
+    finally:
+        GAMES_IN_FLIGHT.dec()
+        if not finished:
+            # cancelled or failed: no journal end, so the game stays resumable
+            log.warning(f"[{name}] Game aborted after {board.ply()} plies")
+            EVENTS.publish("end", name, result="*", termination="aborted", reason="Aborted",
+                           plies=board.ply(), seconds=round(time.perf_counter() - started, 3))
+        if sessions:
+            # an error closing one session must not hide the game's own
+            await asyncio.gather(*(session.close() for session in sessions.values()), return_exceptions=True)
+
+
+async def start_http_server(port: int = METRICS_PORT,
+                            host: str = METRICS_HOST) -> tuple[uvicorn.Server, asyncio.Task] | None:
+    """Serve /metrics and the /events spectator stream in the background while games run.
+
+    None when disabled or when the port cannot be bound: the games go on without them.
+    """
+    if not port:
+        return None
+    # bind here, so a port in use is a warning instead of uvicorn's sys.exit inside a task
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+    except OSError as e:
+        sock.close()
+        log.warning(f"Metrics and live game events disabled, cannot listen on {host}:{port}: {e}")
+        return None
+    app = Starlette(routes=[Route("/metrics", metrics_endpoint, methods=["GET"]),
+                            Route("/events", EVENTS.endpoint, methods=["GET"])])
+    # a spectator that stopped reading cannot hold up the shutdown for more than a few seconds
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning",
+                                           timeout_graceful_shutdown=5))
+
+    async def serve() -> None:
+        try:
+            await server.serve(sockets=[sock])
+        except SystemExit:
+            log.warning(f"Metrics and live game events on {host}:{port} failed to start; continuing without them")
+
+    task = asyncio.create_task(serve())
+    while not server.started and not task.done():
+        await asyncio.sleep(0.01)
+    if not server.started:
+        return None
+    log.info(f"Metrics at http://{host}:{port}/metrics, live games at http://{host}:{port}/events")
+    return server, task
+
+
+async def stop_http_server(http: tuple[uvicorn.Server, asyncio.Task] | None) -> None:
+    if http is None:
+        return
+    server, task = http
+    # open event streams would keep the server from shutting down
+    EVENTS.close()
+    server.should_exit = True
+    await task
+
+
+def open_journal() -> tuple[GameLog | None, list[JournaledGame]]:
+    """The GAME_LOG journal (None when disabled) and the unfinished games it holds."""
+    if not GAME_LOG:
+        return None, []
+    pending = unfinished(GAME_LOG)
+    if pending:
+        log.info(f"{len(pending)} unfinished game(s) in {GAME_LOG}: "
+                 + ", ".join(f"{g.name} after {len(g.moves)} plies" for g in pending))
+    return GameLog(GAME_LOG, GAME_LOG_FSYNC_EVERY, GAME_LOG_FSYNC_SECONDS), pending
+
+
+def make_workbenches() -> tuple[AgentPool, AgentPool]:
+    """Configure the replica pools (one session per agent URL) for the white and black agents."""
+    wb_white = AgentPool("white", WHITE_URLS, timeout=90)
+    wb_black = AgentPool("black", BLACK_URLS, timeout=90)
+    return wb_white, wb_black
+
+
+async def run() -> None:
+    http = await start_http_server()
+    # initialize UI with the starting FEN; drawing happens on the GUI thread
+    renderer = make_renderer(HEADLESS)
+    renderer.start(chess.Board().fen())
+
+    journal, pending = open_journal()
+    # every interrupted game is finished first, one after another; a new game only when there was none
+    resumed, numbers = plan_rounds(pending, 1)
+    wb_white, wb_black = make_workbenches()
+    try:
+        async with wb_white, wb_black:
+            for number in numbers:
+                game = await play_game(wb_white, wb_black, name=f"game {number}",
+                                       on_move=lambda b: renderer.update(b.fen()),
+                                       journal=journal, resume=resumed.get(number),
+                                       headers={"Round": str(number)} if number in resumed else None)
+                if game.headers["Result"] == "*":
+                    # abandoned: left in the journal for the next run instead of recorded truncated
+                    continue
+                await asyncio.to_thread(append_pgn, GAME_RECORD, game)
+                log.info(f"[game {number}] appended to {GAME_RECORD}")
+    finally:
+        if journal:
+            journal.close()
+
+    if PLY_DELAY:
+        await asyncio.sleep(PLY_DELAY)  # leave the final position on screen
+    await asyncio.to_thread(renderer.close)
+    await stop_http_server(http)
+
+
+async def run_tournament(games: int = GAMES, max_concurrent: int = MAX_CONCURRENT_GAMES) -> None:
+    """Play `games` headless games concurrently over one pair of shared SSE sessions.
+
+    At most `max_concurrent` games are in flight at once, so the agents see up to
+    that many outstanding `move` calls instead of one. Unfinished games from the
+    journal are all resumed first and fresh games fill up to `games`, in the
+    same order as mcp_stdio/BoardAgent.py; every game is appended to
+    GAME_RECORD as soon as it ends.
+    """
+    http = await start_http_server()
+    limit = asyncio.Semaphore(max_concurrent)
+    started = time.perf_counter()
+    played: dict[int, chess.pgn.Game] = {}
+    journal, pending = open_journal()
+    resumed, numbers = plan_rounds(pending, games)
+
+    async def one_game(number: int) -> None:
+        async with limit:
+            t0 = time.perf_counter()
+            game = await play_game(wb_white, wb_black, name=f"game {number}", journal=journal,
+                                   resume=resumed.get(number), headers={"Round": str(number)})
+            if game.headers["Result"] == "*":
+                log.warning(f"[game {number}] abandoned after {game.end().ply()} plies; it resumes on the next run")
+                return
+            played[number] = game
+            await asyncio.to_thread(append_pgn, GAME_RECORD, game)
+            log.info(f"[game {number}] finished in {time.perf_counter() - t0:.1f}s "
+                     f"after {game.end().ply()} plies")
+
+    wb_white, wb_black = make_workbenches()
+    try:
+        async with wb_white, wb_black:
+            results = await asyncio.gather(*(one_game(n) for n in numbers), return_exceptions=True)
+    finally:
+        if journal:
+            journal.close()
+    for number, res in zip(numbers, results):
+        if isinstance(res, BaseException):
+            log.error(f"[game {number}] crashed: {res!r}")
+
+    elapsed = time.perf_counter() - started
+    plies = sum(g.end().ply() for g in played.values())
+    log.info(f"Tournament done: {len(played)}/{games} games, {plies} plies in {elapsed:.1f}s "
+             f"({len(played) * 3600 / elapsed:.1f} games/hour, "
+             f"max {max_concurrent} concurrent)")
+    log.info(f"{len(played)} games appended to {GAME_RECORD}")
+    await stop_http_server(http)
 
-            # apply and render
-            board.push(mv)
-            display.update(board.fen(), game_board)
-            log.info(f"Applied move {uci}")
-           
-            # swap turns
-            current_wb, other_wb       = other_wb, current_wb
-            current_name, other_name   = other_name, current_name
-            await asyncio.sleep(2)
-
-    # game over summary
-    result = board.result()
-    reason = ("Checkmate" if board.is_checkmate() else
-              "Stalemate" if board.is_stalemate() else
-              "Insufficient material" if board.is_insufficient_material() else
-              "Fifty-move rule" if board.can_claim_fifty_moves() else
-              "Threefold repetition" if board.can_claim_threefold_repetition() else
-              "Unknown")
-    log.info(f"Game over: {result} - {reason}")
-
-    # export PGN
-    game = chess.pgn.Game.from_board(board)
-    with open("game_record.pgn", "w") as f:
-        f.write(str(game))
-    log.info("Game saved to game_record.pgn")
-
-    display.terminate(game_board)
-    await asyncio.sleep(2)
 
 if __name__ == "__main__":
     # URLs may include /sse or root depending on agent setup
     log.info("Starting Board Orchestrator (SSE)!")
-    asyncio.run(run())
+    configure_tracing("chess-board", TRACE_FILE, TRACE_OTLP_ENDPOINT, TRACE_SAMPLE)
+    if GAMES > 1:
+        asyncio.run(run_tournament())
+    else:
+        asyncio.run(run())
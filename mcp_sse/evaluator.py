@@ -0,0 +1,173 @@
+"""Fast static evaluator used to rank and prune the agents' move menus.
+
+Scores are centipawns. A position's score is material plus piece-square
+tables (the "simplified evaluation function" tables); a candidate move is
+scored from the mover's side after it is played, minus what the opponent
+could win back with one capture (a piece attacked and undefended, or attacked
+by something cheaper). Checkmating moves rank first.
+
+Tables are flat `array('h')` buffers indexed by ``piece_type * 64 + square``
+so the scoring loops only touch integer arrays and python-chess bitboards;
+`score_positions` scores a whole batch in one call.
+"""
+from array import array
+from typing import Iterable
+
+import chess
+
+MATE_SCORE = 100_000
+
+# indexed by piece type (index 0 unused); the king is never traded
+MATERIAL = array("h", [0, 100, 320, 330, 500, 900, 0])
+
+# visual layout: first row is rank 8, from White's point of view
+_PST_VISUAL = {
+    chess.PAWN: [
+         0,  0,  0,  0,  0,  0,  0,  0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+         5,  5, 10, 25, 25, 10,  5,  5,
+         0,  0,  0, 20, 20,  0,  0,  0,
+         5, -5,-10,  0,  0,-10, -5,  5,
+         5, 10, 10,-20,-20, 10, 10,  5,
+         0,  0,  0,  0,  0,  0,  0,  0,
+    ],
+    chess.KNIGHT: [
+        -50,-40,-30,-30,-30,-30,-40,-50,
+        -40,-20,  0,  0,  0,  0,-20,-40,
+        -30,  0, 10, 15, 15, 10,  0,-30,
+        -30,  5, 15, 20, 20, 15,  5,-30,
+        -30,  0, 15, 20, 20, 15,  0,-30,
+        -30,  5, 10, 15, 15, 10,  5,-30,
+        -40,-20,  0,  5,  5,  0,-20,-40,
+        -50,-40,-30,-30,-30,-30,-40,-50,
+    ],
+    chess.BISHOP: [
+        -20,-10,-10,-10,-10,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5, 10, 10,  5,  0,-10,
+        -10,  5,  5, 10, 10,  5,  5,-10,
+        -10,  0, 10, 10, 10, 10,  0,-10,
+        -10, 10, 10, 10, 10, 10, 10,-10,
+        -10,  5,  0,  0,  0,  0,  5,-10,
+        -20,-10,-10,-10,-10,-10,-10,-20,
+    ],
+    chess.ROOK: [
+         0,  0,  0,  0,  0,  0,  0,  0,
+         5, 10, 10, 10, 10, 10, 10,  5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+        -5,  0,  0,  0,  0,  0,  0, -5,
+         0,  0,  0,  5,  5,  0,  0,  0,
+    ],
+    chess.QUEEN: [
+        -20,-10,-10, -5, -5,-10,-10,-20,
+        -10,  0,  0,  0,  0,  0,  0,-10,
+        -10,  0,  5,  5,  5,  5,  0,-10,
+         -5,  0,  5,  5,  5,  5,  0, -5,
+          0,  0,  5,  5,  5,  5,  0, -5,
+        -10,  5,  5,  5,  5,  5,  0,-10,
+        -10,  0,  5,  0,  0,  0,  0,-10,
+        -20,-10,-10, -5, -5,-10,-10,-20,
+    ],
+    chess.KING: [
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -30,-40,-40,-50,-50,-40,-40,-30,
+        -20,-30,-30,-40,-40,-30,-30,-20,
+        -10,-20,-20,-20,-20,-20,-20,-10,
+         20, 20,  0,  0,  0,  0, 20, 20,
+         20, 30, 10,  0,  0, 10, 30, 20,
+    ],
+}
+
+
+def _build_tables() -> tuple[array, array]:
+    """Material + PST per (piece type, square), one flat array per color."""
+    white = array("h", [0] * 7 * 64)
+    black = array("h", [0] * 7 * 64)
+    for piece_type, visual in _PST_VISUAL.items():
+        for square in range(64):
+            # visual index of a1-based `square` for White is square ^ 56; Black sees the board mirrored
+            white[piece_type * 64 + square] = MATERIAL[piece_type] + visual[square ^ 56]
+            black[piece_type * 64 + square] = MATERIAL[piece_type] + visual[square]
+    return white, black
+
+
+PIECE_SQUARE_WHITE, PIECE_SQUARE_BLACK = _build_tables()
+
+
+def evaluate(board: chess.Board) -> int:
+    """Material + piece-square score of `board` from White's point of view."""
+    score = 0
+    occupied_white = board.occupied_co[chess.WHITE]
+    occupied_black = board.occupied_co[chess.BLACK]
+    for piece_type, mask in ((chess.PAWN, board.pawns), (chess.KNIGHT, board.knights),
+                             (chess.BISHOP, board.bishops), (chess.ROOK, board.rooks),
+                             (chess.QUEEN, board.queens), (chess.KING, board.kings)):
+        base = piece_type * 64
+        for square in chess.scan_forward(mask & occupied_white):
+            score += PIECE_SQUARE_WHITE[base + square]
+        for square in chess.scan_forward(mask & occupied_black):
+            score -= PIECE_SQUARE_BLACK[base + square]
+    return score
+
+
+def hanging_loss(board: chess.Board, color: chess.Color) -> int:
+    """Most material `color` can lose to one capture: undefended pieces, or pieces attacked by cheaper ones."""
+    worst = 0
+    enemy = not color
+    for square in chess.scan_forward(board.occupied_co[color] & ~board.kings):
+        attackers = board.attackers_mask(enemy, square)
+        if not attackers:
+            continue
+        value = MATERIAL[board.piece_type_at(square)]
+        if not board.is_attacked_by(color, square):
+            loss = value
+        else:
+            # the king cannot take a defended piece
+            attackers &= ~board.kings
+            if not attackers:
+                continue
+            loss = value - min(MATERIAL[board.piece_type_at(a)] for a in chess.scan_forward(attackers))
+        worst = max(worst, loss)
+    return worst
+
+
+def score_positions(boards: Iterable[chess.Board]) -> array:
+    """Static scores for many positions, each from its side to move's point of view."""
+    return array("i", (evaluate(b) if b.turn == chess.WHITE else -evaluate(b) for b in boards))
+
+
+def score_move(board: chess.Board, move: chess.Move) -> int:
+    """Score of playing `move`, from the mover's point of view."""
+    mover = board.turn
+    board.push(move)
+    try:
+        if board.is_checkmate():
+            return MATE_SCORE
+        score = evaluate(board) if mover == chess.WHITE else -evaluate(board)
+        return score - hanging_loss(board, mover)
+    finally:
+        board.pop()
+
+
+def rank_moves(board: chess.Board) -> list[tuple[chess.Move, int]]:
+    """All legal moves with their scores, best first."""
+    ranked = [(move, score_move(board, move)) for move in board.legal_moves]
+    ranked.sort(key=lambda item: item[1], reverse=True)
+    return ranked
+
+
+def top_moves(board: chess.Board, k: int) -> list[chess.Move]:
+    """The `k` best legal moves by static score."""
+    return [move for move, _ in rank_moves(board)[:k]]
+
+
+def best_move(board: chess.Board) -> chess.Move | None:
+    """The statically best legal move, or None when there is none."""
+    ranked = top_moves(board, 1)
+    return ranked[0] if ranked else None
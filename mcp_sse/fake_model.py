@@ -0,0 +1,199 @@
+"""Local stand-in for the Azure OpenAI chat completions endpoint.
+
+Answers ``POST /openai/deployments/{deployment}/chat/completions`` the way the
+agents' `AzureOpenAIChatCompletionClient` expects, without a real model: the
+reply is a legal move for the FEN in the last user message, restricted to the
+move menu on its last line when there is one (the SSE agents' prompt and
+retry prompt both end with the menu; the stdio agents only send the FEN).
+Prompts asking for "your N best moves" get {"moves": [...]} with N of them.
+
+Point the agents at it to measure orchestration and transport overhead offline:
+
+    uv run mcp_sse/fake_model.py --port 8100 --latency-ms 50 --error-rate 0.01
+    AZURE_OPENAI_ENDPOINT=http://localhost:8100 AZURE_OPENAI_API_KEY=fake uv run mcp_sse/white/white_agent.py
+
+Moves are deterministic for a given seed and prompt. `latency_ms` ± `jitter_ms`
+is slept before every answer, plus `tail_ms` for `tail_rate` of them (a slow
+tail to hedge against); `error_rate` of the requests fail with HTTP 500
+and `illegal_rate` of the answered moves are not in the menu, so the
+agents' retry paths can be exercised too. With `rpm`, requests beyond that
+quota (10 seconds' worth may be used at once, like Azure) get HTTP 429
+with Retry-After.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+
+import chess
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+FEN_RE = re.compile(r"([pnbrqkPNBRQK1-8]+(?:/[pnbrqkPNBRQK1-8]+){7} [wb] (?:-|[KQkq]+) (?:-|[a-h][36]) \d+ \d+)")
+UCI_RE = re.compile(r"^[a-h][1-8][a-h][1-8][nbrq]?$")
+RANKED_RE = re.compile(r"your (\d+) best moves")
+
+
+def _text(content) -> str:
+    # content is a string, or a list of parts for multimodal messages
+    if isinstance(content, str):
+        return content
+    return " ".join(part.get("text", "") for part in content or [] if isinstance(part, dict))
+
+
+def candidate_moves(prompt: str) -> list[str]:
+    """Legal moves the prompt allows: its menu line, its FEN's legal moves, or both intersected."""
+    legal: list[str] | None = None
+    match = FEN_RE.search(prompt)
+    if match:
+        try:
+            legal = [m.uci() for m in chess.Board(match.group(1)).legal_moves]
+        except ValueError:
+            legal = None
+    lines = prompt.strip().splitlines()
+    menu = [token.strip() for token in lines[-1].split(":")[-1].split(",")] if lines else []
+    menu = [token for token in menu if UCI_RE.match(token)]
+    if legal is None:
+        return menu
+    return [m for m in menu if m in legal] or legal
+
+
+class FakeModel:
+    """Chooses moves and injects latency / failures for the chat completions route."""
+
+    def __init__(self,
+                 latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0,
+                 error_rate: float = 0.0,
+                 illegal_rate: float = 0.0,
+                 seed: int = 0,
+                 tail_rate: float = 0.0,
+                 tail_ms: float = 0.0,
+                 model: str = "gpt-4o-2024-08-06",
+                 rpm: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.illegal_rate = illegal_rate
+        self.seed = seed
+        self.tail_rate = tail_rate
+        self.tail_ms = tail_ms
+        # reported model version; the agents' default "gpt-4o" resolves to this snapshot
+        self.model = model
+        self.rpm = rpm
+        # quota bucket: holds rpm / 6 requests (10 seconds' worth), refilled continuously
+        self._quota = rpm / 6
+        self._quota_updated = time.monotonic()
+        # failure injection follows one seeded sequence; move choice is seeded per prompt
+        self._rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.illegal = 0
+        self.throttled = 0
+
+    def _throttle(self) -> float | None:
+        """Seconds until quota is available if this request is over it, else None."""
+        if not self.rpm:
+            return None
+        now = time.monotonic()
+        self._quota = min(self.rpm / 6, self._quota + (now - self._quota_updated) * self.rpm / 60)
+        self._quota_updated = now
+        if self._quota < 1:
+            return (1 - self._quota) * 60 / self.rpm
+        self._quota -= 1
+        return None
+
+    def _pick(self, move: str) -> str:
+        if self._rng.random() < self.illegal_rate:
+            self.illegal += 1
+            return "a1a1"
+        return move
+
+    def choose(self, prompt: str) -> str:
+        """One move, or {"moves": [...]} when the prompt asks for ranked candidates."""
+        moves = candidate_moves(prompt) or ["resign"]
+        rng = random.Random(f"{self.seed}:{prompt}")
+        ranked = RANKED_RE.search(prompt)
+        if ranked:
+            picks = rng.sample(moves, min(int(ranked.group(1)), len(moves)))
+            return json.dumps({"moves": [self._pick(m) for m in picks]})
+        return self._pick(rng.choice(moves))
+
+    async def chat_completions(self, request: Request) -> JSONResponse:
+        self.requests += 1
+        wait = self._throttle()
+        if wait is not None:
+            self.throttled += 1
+            return JSONResponse({"error": {"code": "429", "message": "Rate limit is exceeded."}}, status_code=429,
+                                headers={"retry-after": str(math.ceil(wait)), "retry-after-ms": str(int(wait * 1000))})
+        body = await request.json()
+        delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+        if self._rng.random() < self.tail_rate:
+            delay += self.tail_ms
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if self._rng.random() < self.error_rate:
+            self.errors += 1
+            return JSONResponse({"error": {"code": "InternalServerError", "message": "injected failure"}},
+                                status_code=500)
+
+        messages = body.get("messages", [])
+        prompt = next((_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+        content = self.choose(prompt)
+        prompt_tokens = sum(len(_text(m.get("content"))) for m in messages) // 4
+        return JSONResponse({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": self.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 2, "total_tokens": prompt_tokens + 2},
+        })
+
+    async def stats(self, request: Request) -> JSONResponse:
+        return JSONResponse({"requests": self.requests, "errors": self.errors, "illegal": self.illegal,
+                             "throttled": self.throttled})
+
+
+def create_app(model: FakeModel) -> Starlette:
+    return Starlette(routes=[
+        Route("/openai/deployments/{deployment}/chat/completions", model.chat_completions, methods=["POST"]),
+        Route("/stats", model.stats, methods=["GET"]),
+    ])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("FAKE_MODEL_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_MODEL_PORT", "8100")))
+    parser.add_argument("--latency-ms", type=float, default=float(os.getenv("FAKE_MODEL_LATENCY_MS", "0")))
+    parser.add_argument("--jitter-ms", type=float, default=float(os.getenv("FAKE_MODEL_JITTER_MS", "0")))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("FAKE_MODEL_ERROR_RATE", "0")))
+    parser.add_argument("--illegal-rate", type=float, default=float(os.getenv("FAKE_MODEL_ILLEGAL_RATE", "0")))
+    parser.add_argument("--seed", type=int, default=int(os.getenv("FAKE_MODEL_SEED", "0")))
+    parser.add_argument("--tail-rate", type=float, default=float(os.getenv("FAKE_MODEL_TAIL_RATE", "0")))
+    parser.add_argument("--tail-ms", type=float, default=float(os.getenv("FAKE_MODEL_TAIL_MS", "0")))
+    parser.add_argument("--model", default=os.getenv("FAKE_MODEL_NAME", "gpt-4o-2024-08-06"))
+    parser.add_argument("--rpm", type=float, default=float(os.getenv("FAKE_MODEL_RPM", "0")),
+                        help="requests per minute before HTTP 429 (0 = unlimited)")
+    args = parser.parse_args()
+
+    model = FakeModel(args.latency_ms, args.jitter_ms, args.error_rate, args.illegal_rate, args.seed,
+                      args.tail_rate, args.tail_ms, args.model, args.rpm)
+    uvicorn.run(create_app(model), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
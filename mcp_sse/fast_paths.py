@@ -0,0 +1,85 @@
+"""Rule-based answers for positions that do not need the model.
+
+Each rule looks only at the `chess.Board` (and optionally the opponent's last
+move) and either returns a move or passes:
+
+  • only_move  — exactly one legal move.
+  • mate_in_one — a move that checkmates immediately.
+  • recapture  — the opponent's last move landed on a square we can capture
+                 on, and our cheapest capture there wins material outright:
+                 the piece is worth more than our capturer, or nothing can
+                 take back.
+
+`FastPaths` counts how often each rule fires.
+"""
+from collections import Counter
+
+import chess
+
+# pawn units; the king only matters as a capturer, where it must never look cheap
+PIECE_VALUES = {chess.PAWN: 1, chess.KNIGHT: 3, chess.BISHOP: 3, chess.ROOK: 5, chess.QUEEN: 9, chess.KING: 100}
+
+
+def only_move(board: chess.Board, legal: list[chess.Move]) -> chess.Move | None:
+    return legal[0] if len(legal) == 1 else None
+
+
+def mate_in_one(board: chess.Board, legal: list[chess.Move]) -> chess.Move | None:
+    for move in legal:
+        if not board.gives_check(move):
+            continue
+        board.push(move)
+        mate = board.is_checkmate()
+        board.pop()
+        if mate:
+            return move
+    return None
+
+
+def recapture(board: chess.Board, legal: list[chess.Move], last_move: chess.Move | None) -> chess.Move | None:
+    if last_move is None:
+        return None
+    square = last_move.to_square
+    target = board.piece_at(square)
+    if target is None or target.color == board.turn:
+        return None
+    captures = [m for m in legal if m.to_square == square]
+    if not captures:
+        return None
+    move = min(captures, key=lambda m: PIECE_VALUES[board.piece_type_at(m.from_square)])
+    gain = PIECE_VALUES[target.piece_type] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+    if gain > 0:
+        return move
+    board.push(move)
+    defended = board.is_attacked_by(board.turn, square)
+    board.pop()
+    return None if defended else move
+
+
+class FastPaths:
+    """Runs the rules in order and counts which one answered."""
+
+    RULES = ("only_move", "mate_in_one", "recapture")
+
+    def __init__(self):
+        self.fired: Counter[str] = Counter()
+        self.passed = 0
+
+    def decide(self, board: chess.Board, last_move: chess.Move | None = None) -> tuple[str, chess.Move] | None:
+        """Return (rule, move) for the first rule that fires, or None."""
+        legal = list(board.legal_moves)
+        rules = (
+            ("only_move", lambda: only_move(board, legal)),
+            ("mate_in_one", lambda: mate_in_one(board, legal)),
+            ("recapture", lambda: recapture(board, legal, last_move)),
+        )
+        for rule, check in rules:
+            move = check()
+            if move is not None:
+                self.fired[rule] += 1
+                return rule, move
+        self.passed += 1
+        return None
+
+    def stats(self) -> dict:
+        return {**{rule: self.fired[rule] for rule in self.RULES}, "passed": self.passed}
@@ -0,0 +1,198 @@
+"""Append-only journal of games in progress, and PGN output that never overwrites.
+
+Every event is one JSON line appended to the journal (GAME_LOG, default
+game_log.jsonl); lines of concurrent games interleave freely:
+
+    {"game": "3f2a…", "event": "start", "name": "game 3", "headers": {"Round": "3"},
+     "time_control": {"move": 60, "game": 1800}}
+    {"game": "3f2a…", "event": "ply", "ply": 17, "uci": "e2e4", "clocks": [1712.4, 1698.0]}
+    {"game": "3f2a…", "event": "end", "result": "1-0", "termination": "normal"}
+
+Each line is flushed to the OS as it is written, so a crashed process loses
+nothing; `os.fsync` runs every `fsync_every` lines, every `fsync_interval`
+seconds and at each game start and end, so a power loss costs at most one
+batch. Batched fsyncs run on a worker thread and never hold up the event
+loop; `start` and `end` await theirs.
+
+`unfinished` replays a journal (skipping a torn last line) into the games
+that started but never ended: their moves and clocks are enough to continue
+from the last position without asking an agent about any earlier ply.
+`plan_rounds` gives both orchestrators the same order: every unfinished
+game first, then fresh ones.
+`append_pgn` adds one finished game to a PGN file.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+import chess
+import chess.pgn
+
+log = logging.getLogger(__name__)
+
+
+class JournaledGame:
+    """A game reconstructed from the journal."""
+
+    def __init__(self, game_id: str, name: str, headers: dict[str, str]):
+        self.game_id = game_id
+        self.name = name
+        self.headers = headers
+        self.moves: list[str] = []
+        self.clocks: list[float] | None = None
+        # seconds per move and per side the game started with ({"move": …, "game": …})
+        self.time_control: dict[str, float] | None = None
+        self.finished = False
+
+    def board(self) -> chess.Board:
+        """The position after the journaled moves, with its full move stack."""
+        board = chess.Board()
+        for uci in self.moves:
+            board.push_uci(uci)
+        return board
+
+
+class GameLog:
+    """Writer for the journal; one per process, shared by all games."""
+
+    def __init__(self, path: str, fsync_every: int = 32, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = open(path, "a+b")
+        # a crash mid-write leaves a torn line; start the next record on a fresh line
+        if self._file.tell() > 0:
+            self._file.seek(-1, os.SEEK_END)
+            if self._file.read(1) != b"\n":
+                self._file.write(b"\n")
+        self._pending = 0
+        self._synced = time.monotonic()
+        # one fsync at a time, and none racing `close`
+        self._sync_lock = threading.Lock()
+        self._syncing: asyncio.Task | None = None
+        self.records = 0
+        self.fsyncs = 0
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        self._file.flush()
+        self.records += 1
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._synced >= self.fsync_interval:
+            self._sync_in_background()
+
+    def _sync_in_background(self) -> None:
+        if self._syncing is not None and not self._syncing.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.sync()
+            return
+        self._syncing = loop.create_task(self._background_sync())
+
+    async def _background_sync(self) -> None:
+        try:
+            await asyncio.to_thread(self.sync)
+        except OSError as e:
+            log.warning(f"fsync of {self.path} failed: {e}")
+
+    def sync(self) -> None:
+        with self._sync_lock:
+            pending = self._pending
+            if pending and not self._file.closed:
+                os.fsync(self._file.fileno())
+                self.fsyncs += 1
+                self._pending -= pending
+            self._synced = time.monotonic()
+
+    async def start(self, game_id: str, name: str, headers: dict[str, str] | None = None,
+                    time_control: dict[str, float] | None = None) -> None:
+        record = {"game": game_id, "event": "start", "name": name, "headers": headers or {}}
+        if time_control is not None:
+            record["time_control"] = time_control
+        self._write(record)
+        await asyncio.to_thread(self.sync)
+
+    def ply(self, game_id: str, ply: int, uci: str, clocks: list[float] | None = None) -> None:
+        record = {"game": game_id, "event": "ply", "ply": ply, "uci": uci}
+        if clocks is not None:
+            record["clocks"] = [round(c, 3) for c in clocks]
+        self._write(record)
+
+    async def end(self, game_id: str, result: str, termination: str) -> None:
+        self._write({"game": game_id, "event": "end", "result": result, "termination": termination})
+        await asyncio.to_thread(self.sync)
+
+    def close(self) -> None:
+        self.sync()
+        with self._sync_lock:
+            self._file.close()
+
+
+def read_journal(path: str) -> dict[str, JournaledGame]:
+    """Every game in the journal at `path`, in order of their start records."""
+    games: dict[str, JournaledGame] = {}
+    if not os.path.exists(path):
+        return games
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, start=1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                if line.strip():
+                    log.warning(f"Skipping torn journal line {number} in {path}")
+                continue
+            game = games.get(record.get("game"))
+            event = record.get("event")
+            if event == "start":
+                game = games[record["game"]] = JournaledGame(record["game"], record.get("name", "game"),
+                                                             record.get("headers", {}))
+                game.time_control = record.get("time_control")
+            elif game is None:
+                continue
+            elif event == "ply" and record["ply"] == len(game.moves) + 1:
+                game.moves.append(record["uci"])
+                game.clocks = record.get("clocks", game.clocks)
+            elif event == "end":
+                game.finished = True
+    return games
+
+
+def unfinished(path: str) -> list[JournaledGame]:
+    """Games in the journal that never reached their end record."""
+    return [game for game in read_journal(path).values() if not game.finished]
+
+
+def plan_rounds(pending: list[JournaledGame], games: int) -> tuple[dict[int, JournaledGame], list[int]]:
+    """Round numbers to play: every game in `pending` first, then fresh rounds up to `games` in total.
+
+    A resumed game keeps its Round header; one without (a single-game run) gets
+    the lowest free number, in journal order.
+    """
+    resumed: dict[int, JournaledGame] = {}
+    for game in pending:
+        if game.headers.get("Round", "").isdigit() and int(game.headers["Round"]) not in resumed:
+            resumed[int(game.headers["Round"])] = game
+    free = (n for n in itertools.count(1) if n not in resumed)
+    for game in pending:
+        if game not in resumed.values():
+            resumed[next(free)] = game
+    fresh = (n for n in itertools.count(1) if n not in resumed)
+    numbers = sorted(resumed) + [next(fresh) for _ in range(games - len(resumed))]
+    return resumed, numbers
+
+
+def append_pgn(path: str, game: chess.pgn.Game) -> None:
+    """Append one game to a PGN file (earlier games are kept) and make it durable.
+
+    Blocks on the fsync; call it through `asyncio.to_thread` from a running game.
+    """
+    with open(path, "a") as f:
+        f.write(str(game) + "\n\n")
+        f.flush()
+        os.fsync(f.fileno())
@@ -0,0 +1,137 @@
+"""Incremental termination and repetition tracking for a game in progress.
+
+`board.is_game_over()` looks for fivefold repetition by scanning the whole
+move stack, and the threefold / fifty-move claims replay it, so every ply of
+a long game costs more than the one before. `GameState` owns the game's
+board and keeps, as moves are pushed:
+
+  • the position's Zobrist hash (polyglot keys), updated from the squares
+    the move touches instead of rehashing the board;
+  • how often each hash occurred since the last capture or pawn move
+    (earlier positions can never recur, so the table stays small).
+
+Repetition and move-rule checks are then dictionary lookups; only mate and
+stalemate still need move generation, which does not depend on game length.
+Positions are compared by hash, so an en passant capture that is pseudo-legal
+but not legal (a pinned pawn) keeps two positions apart that python-chess
+would count as one; such games reach fivefold a few plies later.
+"""
+import chess
+import chess.polyglot
+
+ZOBRIST = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_HASHER = chess.polyglot.ZobristHasher(ZOBRIST)
+
+REASONS = {
+    chess.Termination.CHECKMATE: "Checkmate",
+    chess.Termination.STALEMATE: "Stalemate",
+    chess.Termination.INSUFFICIENT_MATERIAL: "Insufficient material",
+    chess.Termination.SEVENTYFIVE_MOVES: "Seventy-five-move rule",
+    chess.Termination.FIVEFOLD_REPETITION: "Fivefold repetition",
+    chess.Termination.FIFTY_MOVES: "Fifty-move rule",
+    chess.Termination.THREEFOLD_REPETITION: "Threefold repetition",
+}
+
+# sentinel for "outcome not computed for this position yet"
+_UNKNOWN = object()
+
+
+def _pieces_hash(board: chess.BaseBoard, squares: chess.Bitboard) -> int:
+    """Zobrist keys of the pieces on `squares`."""
+    h = 0
+    white = board.occupied_co[chess.WHITE]
+    for square in chess.scan_forward(squares & board.occupied):
+        is_white = 1 if white & chess.BB_SQUARES[square] else 0
+        h ^= ZOBRIST[64 * ((board.piece_type_at(square) - 1) * 2 + is_white) + square]
+    return h
+
+
+class GameState:
+    """A board plus incrementally maintained repetition counts and outcome."""
+
+    def __init__(self, board: chess.Board | None = None):
+        """Track `board` (its moves are replayed once, e.g. for a resumed game) or a new game."""
+        start = chess.Board() if board is None else board.root()
+        self.board = start
+        self._pieces = _HASHER.hash_board(start)
+        self._castling_rights = start.castling_rights
+        self._castling = _HASHER.hash_castling(start)
+        self.hash = self._pieces ^ self._state_hash()
+        self._counts = {self.hash: 1}
+        self._outcome = _UNKNOWN
+        for move in ([] if board is None else board.move_stack):
+            self.push(move)
+
+    def push(self, move: chess.Move) -> None:
+        board = self.board
+        touched = chess.BB_SQUARES[move.from_square] | chess.BB_SQUARES[move.to_square]
+        if board.is_castling(move):
+            # king and rook both move along the back rank
+            touched |= chess.BB_RANK_1 if board.turn == chess.WHITE else chess.BB_RANK_8
+        elif board.is_en_passant(move):
+            touched |= chess.BB_SQUARES[chess.square(chess.square_file(move.to_square),
+                                                     chess.square_rank(move.from_square))]
+        self._pieces ^= _pieces_hash(board, touched)
+        board.push(move)
+        self._pieces ^= _pieces_hash(board, touched)
+        self.hash = self._pieces ^ self._state_hash()
+        if board.halfmove_clock == 0:
+            self._counts.clear()
+        self._counts[self.hash] = self._counts.get(self.hash, 0) + 1
+        self._outcome = _UNKNOWN
+
+    def _state_hash(self) -> int:
+        """Keys of everything but the pieces: castling rights, en passant file, side to move."""
+        board = self.board
+        if board.castling_rights != self._castling_rights:
+            # rights only ever shrink, so this runs a few times per game
+            self._castling_rights = board.castling_rights
+            self._castling = _HASHER.hash_castling(board)
+        h = self._castling ^ (ZOBRIST[780] if board.turn == chess.WHITE else 0)
+        if board.ep_square is not None:
+            h ^= _HASHER.hash_ep_square(board)
+        return h
+
+    def repetitions(self) -> int:
+        """How often the current position has occurred, itself included."""
+        return self._counts[self.hash]
+
+    def outcome(self) -> chess.Outcome | None:
+        """`board.outcome()` without scanning the move stack: mandatory game ends only."""
+        if self._outcome is _UNKNOWN:
+            board = self.board
+            can_move = any(board.generate_legal_moves())
+            if not can_move and board.is_check():
+                self._outcome = chess.Outcome(chess.Termination.CHECKMATE, not board.turn)
+            elif board.is_insufficient_material():
+                self._outcome = chess.Outcome(chess.Termination.INSUFFICIENT_MATERIAL, None)
+            elif not can_move:
+                self._outcome = chess.Outcome(chess.Termination.STALEMATE, None)
+            elif board.halfmove_clock >= 150:
+                self._outcome = chess.Outcome(chess.Termination.SEVENTYFIVE_MOVES, None)
+            elif self.repetitions() >= 5:
+                self._outcome = chess.Outcome(chess.Termination.FIVEFOLD_REPETITION, None)
+            else:
+                self._outcome = None
+        return self._outcome
+
+    def is_game_over(self) -> bool:
+        return self.outcome() is not None
+
+    def claimable_draw(self) -> chess.Termination | None:
+        """A draw either side could claim in the current position."""
+        if self.board.halfmove_clock >= 100:
+            return chess.Termination.FIFTY_MOVES
+        if self.repetitions() >= 3:
+            return chess.Termination.THREEFOLD_REPETITION
+        return None
+
+    def result(self) -> str:
+        outcome = self.outcome()
+        return outcome.result() if outcome else "*"
+
+    def reason(self) -> str:
+        """Human readable reason for the end of the game (or the draw on offer)."""
+        outcome = self.outcome()
+        termination = outcome.termination if outcome else self.claimable_draw()
+        return REASONS.get(termination, "Unknown")
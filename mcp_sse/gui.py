@@ -0,0 +1,87 @@
+"""Board renderers for the orchestrator.
+
+`GuiRenderer` drives the `chessboard` pygame window from one dedicated worker
+thread, so drawing (and the frame-rate sleep inside `display.update`) never
+runs on the event loop that awaits the agents' moves. Only the newest position
+is drawn if moves arrive faster than the window can repaint.
+
+`NullRenderer` is used in headless mode; it never imports `chessboard` or
+pygame.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+
+class NullRenderer:
+    """Headless renderer: does nothing."""
+
+    def start(self, fen: str) -> None:
+        pass
+
+    def update(self, fen: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class GuiRenderer:
+    """Renders positions in the `chessboard` window off the event loop."""
+
+    def __init__(self):
+        # pygame wants every call from the same thread, so use exactly one worker
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gui")
+        self._lock = threading.Lock()
+        self._latest: str | None = None
+        self._draining = False
+        self._display = None
+        self._game_board = None
+
+    def _start(self, fen: str) -> None:
+        from chessboard import display  # imported only when a window is wanted
+        self._display = display
+        self._game_board = display.start(fen)
+
+    def _drain(self) -> None:
+        while True:
+            with self._lock:
+                fen, self._latest = self._latest, None
+                if fen is None:
+                    self._draining = False
+                    return
+            try:
+                self._display.update(fen, self._game_board)
+            except Exception as e:
+                log.warning("GUI update failed: %s", e)
+
+    def start(self, fen: str) -> None:
+        self._executor.submit(self._start, fen)
+
+    def update(self, fen: str) -> None:
+        """Queue `fen` for drawing and return immediately."""
+        with self._lock:
+            self._latest = fen
+            if self._draining:
+                return
+            self._draining = True
+        self._executor.submit(self._drain)
+
+    def _terminate(self) -> None:
+        if self._display is None:
+            return
+        try:
+            self._display.terminate()
+        except SystemExit:  # chessboard exits the process on terminate
+            pass
+
+    def close(self) -> None:
+        """Close the window once pending draws are done."""
+        self._executor.submit(self._terminate)
+        self._executor.shutdown(wait=True)
+
+
+def make_renderer(headless: bool) -> NullRenderer | GuiRenderer:
+    return NullRenderer() if headless else GuiRenderer()
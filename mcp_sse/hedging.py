@@ -0,0 +1,222 @@
+"""Hedged model calls across several deployments.
+
+`HedgedChatCompletionClient` wraps the agent's primary model client and a
+list of alternates (other Azure OpenAI deployments / endpoints). Every
+`create` goes to the primary first; if it is still outstanding after the
+learned `percentile` of how long recent calls took to answer, the same
+request is also sent to the next alternate. The first acceptable answer wins and the other
+request is cancelled. A primary that fails outright is hedged immediately.
+
+"Acceptable" is decided per request by the predicate in the `accept_reply`
+context variable (ChessPlayer sets it to "contains a legal move"), so an
+illegal answer from the faster deployment does not beat a legal one from
+the slower. Without a predicate the first answer wins.
+
+MODEL_DEPLOYMENTS lists the alternates, comma separated, each either a
+deployment name on the primary endpoint or ``deployment@https://endpoint``:
+
+    MODEL_DEPLOYMENTS="gpt-4o-eu@https://chess-eu.openai.azure.com/,gpt-4o-2"
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Callable, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities,
+                                 ModelInfo, RequestUsage)
+from autogen_core.tools import Tool, ToolSchema
+from pydantic import BaseModel
+
+from mcp_sse.metrics import counter, histogram
+from mcp_sse.tracing import span
+
+log = logging.getLogger(__name__)
+
+HEDGES = counter("chess_agent_hedges_total", "Model calls that sent a hedge request, by winner", ["winner"])
+MODEL_SECONDS = histogram("chess_agent_model_call_seconds", "Latency of one model request", ["deployment"])
+
+# per-request check of a finished answer; set by the caller around agent.run()
+accept_reply: ContextVar[Callable[[CreateResult], bool] | None] = ContextVar("accept_reply", default=None)
+
+
+def parse_deployments(spec: str) -> list[tuple[str, str | None]]:
+    """MODEL_DEPLOYMENTS → [(deployment, endpoint or None for the primary endpoint)]."""
+    deployments = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        deployment, _, endpoint = item.partition("@")
+        deployments.append((deployment, endpoint or None))
+    return deployments
+
+
+def _percentile(samples: Sequence[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgedChatCompletionClient(ChatCompletionClient):
+    """Primary client plus alternates; slow primary calls get a second, racing request."""
+
+    def __init__(self,
+                 primary: ChatCompletionClient,
+                 alternates: Sequence[ChatCompletionClient],
+                 names: Sequence[str] = (),
+                 percentile: float = 0.95,
+                 initial_delay: float = 10.0,
+                 min_delay: float = 0.05,
+                 window: int = 200,
+                 min_samples: int = 20):
+        self.primary = primary
+        self.alternates = list(alternates)
+        self.names = list(names) or ["primary"] + [f"alternate-{i}" for i in range(1, len(self.alternates) + 1)]
+        self.percentile = percentile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        # what recent callers waited for the winning answer; the hedge delay is learned from these.
+        # A cancelled primary is not sampled: how long it had run is only a lower bound, and
+        # learning from it would pull the delay down and hedge ever more often
+        self._latencies: deque[float] = deque(maxlen=window)
+        # recent primary calls that completed
+        self._primary: deque[float] = deque(maxlen=window)
+        self._next_alternate = 0
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait for the primary before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, _percentile(self._latencies, self.percentile))
+
+    async def _timed(self, index: int, client: ChatCompletionClient, messages: Sequence[LLMMessage],
+                     kwargs: dict) -> tuple[int, float, CreateResult]:
+        start = time.perf_counter()
+        with span("model.request", deployment=self.names[index], hedge=index > 0):
+            result = await client.create(messages, **kwargs)
+        elapsed = time.perf_counter() - start
+        MODEL_SECONDS.labels(deployment=self.names[index]).observe(elapsed)
+        return index, elapsed, result
+
+    async def create(self,
+                     messages: Sequence[LLMMessage],
+                     *,
+                     tools: Sequence[Tool | ToolSchema] = [],
+                     json_output: Optional[bool | type[BaseModel]] = None,
+                     extra_create_args: Mapping[str, Any] = {},
+                     cancellation_token: Optional[CancellationToken] = None) -> CreateResult:
+        kwargs = dict(tools=tools, json_output=json_output, extra_create_args=extra_create_args,
+                      cancellation_token=cancellation_token)
+        if not self.alternates:
+            return await self.primary.create(messages, **kwargs)
+
+        self.calls += 1
+        accept = accept_reply.get()
+        started = time.perf_counter()
+        primary = asyncio.create_task(self._timed(0, self.primary, messages, kwargs))
+        pending = {primary}
+        hedge: asyncio.Task | None = None
+        fallback: CreateResult | None = None
+        error: BaseException | None = None
+        try:
+            while pending:
+                timeout = None
+                if hedge is None:
+                    timeout = max(0.0, self.hedge_delay() - (time.perf_counter() - started))
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        log.warning("Model request to %s failed: %r", "primary" if task is primary else "alternate", error)
+                        continue
+                    index, elapsed, result = task.result()
+                    if task is primary:
+                        self._primary.append(elapsed)
+                    if accept is None or accept(result):
+                        return self._won(task is hedge, hedge is not None, result, started)
+                    fallback = fallback or result
+                # slow or failed primary and no hedge yet → race an alternate
+                if hedge is None and (not done or primary.exception() is not None):
+                    hedge = asyncio.create_task(self._timed(*self._alternate(), messages, kwargs))
+                    pending.add(hedge)
+                    self.hedged += 1
+            if fallback is not None:
+                return self._won(False, hedge is not None, fallback, started)
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _alternate(self) -> tuple[int, ChatCompletionClient]:
+        index = self._next_alternate % len(self.alternates)
+        self._next_alternate += 1
+        return index + 1, self.alternates[index]
+
+    def _won(self, by_hedge: bool, hedged: bool, result: CreateResult, started: float) -> CreateResult:
+        self._latencies.append(time.perf_counter() - started)
+        if by_hedge:
+            self.hedge_wins += 1
+        if hedged:
+            HEDGES.labels(winner="hedge" if by_hedge else "primary").inc()
+        return result
+
+    def stats(self) -> dict:
+        """Hedge rate and win rate, the current hedge delay and p99 of what callers waited.
+
+        The primary p99 only covers the calls that were not cancelled, so it
+        understates the primary's tail; benchmarks/bench_e2e.py --hedge-to
+        compares model-call p99 against an unhedged run.
+        """
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedge_rate": round(self.hedged / self.calls, 4) if self.calls else 0.0,
+            "hedge_delay_s": round(self.hedge_delay(), 3),
+            "p99_model_s": round(_percentile(self._latencies, 0.99), 3) if self._latencies else 0.0,
+            "p99_primary_completed_s": round(_percentile(self._primary, 0.99), 3) if self._primary else 0.0,
+        }
+
+    def create_stream(self,
+                      messages: Sequence[LLMMessage],
+                      *,
+                      tools: Sequence[Tool | ToolSchema] = [],
+                      json_output: Optional[bool | type[BaseModel]] = None,
+                      extra_create_args: Mapping[str, Any] = {},
+                      cancellation_token: Optional[CancellationToken] = None) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # streams are not hedged
+        return self.primary.create_stream(messages, tools=tools, json_output=json_output,
+                                          extra_create_args=extra_create_args,
+                                          cancellation_token=cancellation_token)
+
+    async def close(self) -> None:
+        for client in (self.primary, *self.alternates):
+            await client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self._sum_usage(lambda c: c.actual_usage())
+
+    def total_usage(self) -> RequestUsage:
+        return self._sum_usage(lambda c: c.total_usage())
+
+    def _sum_usage(self, usage: Callable[[ChatCompletionClient], RequestUsage]) -> RequestUsage:
+        parts = [usage(c) for c in (self.primary, *self.alternates)]
+        return RequestUsage(prompt_tokens=sum(p.prompt_tokens for p in parts),
+                            completion_tokens=sum(p.completion_tokens for p in parts))
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.primary.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.primary.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore[override]
+        return self.primary.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.primary.model_info
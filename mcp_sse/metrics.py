@@ -0,0 +1,200 @@
+"""Minimal Prometheus-style metrics for the agents and the orchestrator.
+
+Counters, gauges and histograms live in one process-wide `REGISTRY` and are
+rendered in the Prometheus text exposition format by `render()`. The agents
+serve it at ``GET /metrics`` on their SSE app; the orchestrator serves it on
+its own small HTTP server (METRICS_PORT).
+
+    MOVES = counter("chess_agent_moves_total", "Answered moves", ["side", "source"])
+    MOVES.labels(side="white", source="cache").inc()
+
+    with timed(PHASE_SECONDS, side="white", phase="model"):
+        ...
+"""
+import math
+import time
+from contextlib import contextmanager
+from typing import Iterator, Sequence
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[n]) for n in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels(...)")
+        return self.labels()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in sorted(self._children.items()):
+            lines.extend(child.render(self.name, self.labelnames, key))
+        return lines
+
+
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def render(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> list[str]:
+        return [f"{name}{_format_labels(labelnames, key)} {_format_value(self.value)}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name: str, labelnames: Sequence[str], key: Sequence[str]) -> list[str]:
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            labels = _format_labels(labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{name}_bucket{labels} {count}")
+        inf_labels = _format_labels(labelnames, key, 'le="+Inf"')
+        lines.append(f"{name}_bucket{inf_labels} {self.count}")
+        lines.append(f"{name}_sum{_format_labels(labelnames, key)} {_format_value(self.sum)}")
+        lines.append(f"{name}_count{_format_labels(labelnames, key)} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        # registering an existing name returns the metric already registered
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+@contextmanager
+def timed(metric: Histogram, **labels: str) -> Iterator[None]:
+    """Observe the wall time of the block in `metric`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        (metric.labels(**labels) if labels else metric).observe(time.perf_counter() - start)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    """Starlette handler for ``GET /metrics``."""
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
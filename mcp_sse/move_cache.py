@@ -0,0 +1,63 @@
+"""Bounded LRU cache of accepted moves, shared by the SSE chess agents.
+
+Positions are keyed by their EPD (piece placement, side to move, castling
+rights and legal en-passant square) so the same position reached through
+different move orders or with different move clocks hits the same entry.
+"""
+from collections import OrderedDict
+
+import chess
+
+
+def position_key(board: chess.Board) -> str:
+    """Normalized position key: EPD without half-move and full-move clocks."""
+    return board.epd()
+
+
+class MoveCache:
+    """Least-recently-used map from position key to a UCI move."""
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._moves: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._moves)
+
+    def get(self, board: chess.Board) -> str | None:
+        """Return the cached move for this position, or None on a miss."""
+        if self.maxsize <= 0:
+            return None
+        key = position_key(board)
+        uci = self._moves.get(key)
+        if uci is None:
+            self.misses += 1
+            return None
+        self._moves.move_to_end(key)
+        self.hits += 1
+        return uci
+
+    def put(self, board: chess.Board, uci: str) -> None:
+        """Remember `uci` as the answer for this position, evicting the oldest entry if full."""
+        if self.maxsize <= 0:
+            return
+        key = position_key(board)
+        self._moves[key] = uci
+        self._moves.move_to_end(key)
+        while len(self._moves) > self.maxsize:
+            self._moves.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._moves),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,127 @@
+"""Polyglot opening book for the SSE chess agents.
+
+The book is a standard Polyglot ``.bin`` file: 16-byte big-endian entries
+(Zobrist key, move, weight, learn) sorted by key. Lookups go through
+python-chess' memory-mapped reader, which binary-searches the file in place,
+so a hit costs microseconds and no model call.
+
+Build a book from a directory of PGNs (or single PGN files):
+
+    uv run ./mcp_sse/opening_book.py pgns/ game_record.pgn -o opening_book.bin --max-ply 16
+"""
+import argparse
+import logging
+import os
+import struct
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import chess
+import chess.pgn
+import chess.polyglot
+
+log = logging.getLogger(__name__)
+
+ENTRY_STRUCT = struct.Struct(">QHHI")
+MAX_WEIGHT = 0xFFFF
+
+
+def encode_move(board: chess.Board, move: chess.Move) -> int:
+    """Polyglot move encoding; castling is stored as king-takes-own-rook (e1h1)."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def iter_pgn_files(paths: Iterable[str | os.PathLike]) -> Iterator[Path]:
+    """Expand directories into the ``*.pgn`` files they contain."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            yield from sorted(path.rglob("*.pgn"))
+        else:
+            yield path
+
+
+def build_book(pgn_paths: Iterable[str | os.PathLike],
+               out_path: str | os.PathLike,
+               max_ply: int = 16,
+               min_count: int = 1) -> int:
+    """Write a Polyglot book from the first `max_ply` plies of every game and return its entry count.
+
+    A move's weight is the number of games that played it from that position;
+    moves seen fewer than `min_count` times are dropped.
+    """
+    counts: Counter[tuple[int, int]] = Counter()
+    games = 0
+    for pgn_file in iter_pgn_files(pgn_paths):
+        with open(pgn_file, encoding="utf-8", errors="replace") as f:
+            while (game := chess.pgn.read_game(f)) is not None:
+                board = game.board()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= max_ply:
+                        break
+                    counts[(chess.polyglot.zobrist_hash(board), encode_move(board, move))] += 1
+                    board.push(move)
+                games += 1
+
+    entries = sorted(((key, raw_move, min(count, MAX_WEIGHT))
+                      for (key, raw_move), count in counts.items() if count >= min_count),
+                     key=lambda e: (e[0], -e[2]))
+    with open(out_path, "wb") as f:
+        for key, raw_move, weight in entries:
+            f.write(ENTRY_STRUCT.pack(key, raw_move, weight, 0))
+    log.info("Built %s: %d entries from %d games", out_path, len(entries), games)
+    return len(entries)
+
+
+class OpeningBook:
+    """Memory-mapped Polyglot book with hit/miss counters."""
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = str(path)
+        self._reader = chess.polyglot.open_reader(path)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._reader)
+
+    def lookup(self, board: chess.Board) -> str | None:
+        """Highest-weighted legal book move for this position in UCI, or None."""
+        entry = self._reader.get(board)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.move.uci()
+
+    def close(self) -> None:
+        self._reader.close()
+
+    def stats(self) -> dict:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def open_book(path: str | os.PathLike | None) -> OpeningBook | None:
+    """Open the book at `path`, or return None when it is not configured or missing."""
+    if not path or not os.path.exists(path):
+        log.info("No opening book at %s; every move goes to the model", path)
+        return None
+    book = OpeningBook(path)
+    log.info("Loaded opening book %s (%d entries)", path, len(book))
+    return book
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="[OpeningBook] %(message)s")
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from PGN files.")
+    parser.add_argument("pgn", nargs="+", help="PGN files or directories containing *.pgn")
+    parser.add_argument("-o", "--output", default="opening_book.bin")
+    parser.add_argument("--max-ply", type=int, default=16, help="only record the first N plies of each game")
+    parser.add_argument("--min-count", type=int, default=1, help="drop moves played in fewer games")
+    args = parser.parse_args()
+    build_book(args.pgn, args.output, max_ply=args.max_ply, min_count=args.min_count)
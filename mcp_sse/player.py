@@ -0,0 +1,411 @@
+"""Move selection shared by the SSE chess agents.
+
+`ChessPlayer` holds everything that differs between the white and the black
+agent (side, prompts, model client) and implements the request pipeline that
+used to be copied into both `move_tool`s:
+
+    FEN → board → legal moves → fast-path rules → opening book → ponder
+        → move cache → model (+ retries)
+
+A request with a deadline that the pipeline cannot meet is answered with the
+static evaluator's best move instead.
+
+With `candidates` > 1 the model is asked for a ranked list in one JSON reply
+and the first legal candidate is played, so a retry is only needed when none
+of them is legal.
+
+With a `Ponderer`, every answered position also starts speculative work on
+the opponent's likely replies (see mcp_sse/ponder.py). Which conversation a
+request runs in is decided by an `AgentContextPolicy` (mcp_sse/agent_context.py).
+Every phase and model call is also a span of the request's trace (mcp_sse/tracing.py).
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Sequence
+
+import chess
+from autogen_agentchat.agents import AssistantAgent
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import ChatCompletionClient, CreateResult, RequestUsage
+
+from mcp_sse.agent_context import AgentContextPolicy
+from mcp_sse.evaluator import best_move, top_moves
+from mcp_sse.fast_paths import FastPaths
+from mcp_sse.hedging import HedgedChatCompletionClient, accept_reply
+from mcp_sse.metrics import counter, histogram, timed
+from mcp_sse.move_cache import MoveCache
+from mcp_sse.opening_book import OpeningBook
+from mcp_sse.ponder import Ponderer
+from mcp_sse.rate_limit import RateLimitedChatCompletionClient, move_priority, request_priority
+from mcp_sse.tracing import span, traced, untraced
+
+log = logging.getLogger(__name__)
+
+MOVE_SECONDS = histogram("chess_agent_move_seconds", "End-to-end time of one move request", ["side"])
+PHASE_SECONDS = histogram("chess_agent_phase_seconds", "Time per move-pipeline phase", ["side", "phase"])
+MOVES = counter("chess_agent_moves_total", "Answered requests by what answered them", ["side", "source"])
+MODEL_CALLS = counter("chess_agent_model_calls_total", "Model round-trips", ["side"])
+RETRIES = counter("chess_agent_retries_total", "Model calls after the first one for the same move", ["side"])
+ILLEGAL_REPLIES = counter("chess_agent_illegal_replies_total", "Model replies that were not a legal move", ["side"])
+TOKENS = counter("chess_agent_tokens_total", "Model tokens", ["side", "kind"])
+PROMPT_TOKENS = histogram("chess_agent_prompt_tokens", "Prompt tokens per model call", ["side"],
+                          buckets=(100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000))
+ROUND_TRIPS = histogram("chess_agent_round_trips", "Model calls per accepted model move", ["side", "mode"],
+                        buckets=(1, 2, 3, 4, 5, 10))
+
+# seconds of a move deadline kept back for choosing the fallback move and replying
+FALLBACK_RESERVE = 0.05
+
+UCI_RE = re.compile(r"\b[a-h][1-8][a-h][1-8][nbrq]?\b")
+
+
+def parse_candidates(reply: str) -> list[str]:
+    """UCI moves in a ranked reply, best first: {"moves": [...]}, a JSON list, or plain text."""
+    text = reply.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None
+    if isinstance(data, dict):
+        data = data.get("moves")
+    if isinstance(data, list):
+        return [str(m).strip().lower() for m in data]
+    return UCI_RE.findall(reply.lower())
+
+
+def proposed_moves(reply: str, ranked: bool) -> list[str]:
+    """Moves a model reply proposes, best first; never empty."""
+    proposed = parse_candidates(reply) if ranked else (reply.strip().split() or [""])[:1]
+    return [m.lower() for m in proposed] or [""]
+
+
+class ChessPlayer:
+    """Chooses legal moves for one side with an LLM-backed AssistantAgent."""
+
+    def __init__(self,
+                 color: chess.Color,
+                 model_client: ChatCompletionClient,
+                 *,
+                 name: str,
+                 description: str,
+                 system_message: str,
+                 max_retries: int = 5,
+                 cache: MoveCache | None = None,
+                 book: OpeningBook | None = None,
+                 ponderer: Ponderer | None = None,
+                 fast_paths: FastPaths | None = None,
+                 context_policy: str = "request",
+                 context_window: int = 20,
+                 top_k: int = 0,
+                 candidates: int = 0,
+                 history_plies: int = 0):
+        self.color = color
+        self.side = chess.COLOR_NAMES[color]
+        self.tag = f"{self.side.title()}Agent"
+        self.model_client = model_client
+        self.name = name
+        self.description = description
+        self.system_message = system_message
+        self.max_retries = max_retries
+        self.cache = cache if cache is not None else MoveCache(0)
+        self.book = book
+        self.ponderer = ponderer
+        self.fast_paths = fast_paths
+        # prompt menu size; 0 lists every legal move
+        self.top_k = top_k
+        # ranked mode: ask for this many candidates per call and play the first legal one; 0 asks for one move
+        self.candidates = candidates
+        # the prompt lists up to this many of the game's last moves, when the board has them (sessions)
+        self.history_plies = history_plies
+        self.contexts = AgentContextPolicy(self.new_agent, context_policy, window=context_window)
+        # prompt size per model call, to check the context stays bounded
+        self.model_calls = 0
+        self.prompt_tokens_total = 0
+        self.prompt_tokens_max = 0
+        self.prompt_tokens_last = 0
+        self.model_moves = 0
+        # seconds per model call as the move pipeline sees it (hedging included), for the p99 in `stats`
+        self.model_seconds: deque[float] = deque(maxlen=1000)
+
+    def new_agent(self, model_context: ChatCompletionContext | None = None) -> AssistantAgent:
+        """A fresh agent sharing this player's model client (and its connection pool)."""
+        return AssistantAgent(
+            name=self.name,
+            model_client=self.model_client,
+            model_context=model_context,
+            description=self.description,
+            system_message=self.system_message,
+        )
+
+    async def choose_move(self,
+                          fen: str,
+                          agent: AssistantAgent | None = None,
+                          ponder: bool = True,
+                          game_id: str | None = None,
+                          last_move: str | None = None,
+                          deadline_ms: int | None = None) -> dict:
+        """Return {"uci": move} or {"error": reason} for the position `fen`.
+
+        `last_move` (the opponent's previous move in UCI) enables the recapture rule.
+        With `deadline_ms`, work still running at the deadline (typically the model
+        call) is cancelled and the evaluator's best move is returned instead,
+        marked with "fallback": "deadline".
+        """
+        log.info("[%s] Received FEN %s", self.tag, fen)
+        # 1 ─ Build a fresh board from the FEN
+        with traced("parse", PHASE_SECONDS, side=self.side, phase="parse"):
+            try:
+                board = chess.Board(fen)
+            except ValueError as e:
+                return self._answer("error", {"error": f"Invalid FEN: {e}"})
+        return await self.choose_board_move(board, agent, ponder, game_id, last_move, deadline_ms)
+
+    async def choose_board_move(self,
+                                board: chess.Board,
+                                agent: AssistantAgent | None = None,
+                                ponder: bool = True,
+                                game_id: str | None = None,
+                                last_move: str | None = None,
+                                deadline_ms: int | None = None) -> dict:
+        """`choose_move` for a board the caller keeps, e.g. a session's (left unchanged)."""
+        with timed(MOVE_SECONDS, side=self.side):
+            if board.turn != self.color:
+                return self._answer("error", {"error": f"It's not {self.side}'s turn in this position"})
+
+            try:
+                last = chess.Move.from_uci(last_move) if last_move else None
+            except ValueError:
+                last = None
+            # keep FALLBACK_RESERVE of the budget to pick the local move and reply
+            budget = None if deadline_ms is None else deadline_ms / 1000 - FALLBACK_RESERVE
+            # quota goes first to the nearest deadline, then to the game furthest along
+            priority = request_priority.set(
+                move_priority(None if budget is None else time.monotonic() + budget, board.ply()))
+            agent = agent or self.contexts.agent_for(game_id)
+            try:
+                # the wait for a shared agent counts against the move's budget
+                async with asyncio.timeout(budget), self.contexts.lock(agent):
+                    result = await self._decide(board, agent, last_move=last)
+            except TimeoutError:
+                with span("fallback", reason="deadline"):
+                    move = best_move(board)
+                if move is None:
+                    return self._answer("error", {"error": "no legal moves"})
+                log.warning("[%s] Deadline of %d ms reached; playing fallback %s", self.tag, deadline_ms, move.uci())
+                result = self._answer("deadline", {"uci": move.uci(), "fallback": "deadline"})
+            finally:
+                request_priority.reset(priority)
+
+        # think on the opponent's time: solve their likely replies in the background
+        if ponder and self.ponderer is not None and "uci" in result:
+            after = board.copy(stack=False)
+            after.push_uci(result["uci"])
+            # speculative work outlives this request; keep it out of the request's trace
+            with untraced():
+                self.ponderer.schedule(after, self._speculate)
+        return result
+
+    async def _speculate(self, board: chess.Board) -> dict:
+        # ponder work only gets model quota that no real move is waiting for
+        request_priority.set(move_priority(None, board.ply(), speculative=True))
+        return await self._decide(board, self.new_agent(), speculative=True)
+
+    def _answer(self, source: str, result: dict, speculative: bool = False) -> dict:
+        """Count what answered the request and pass `result` through."""
+        MOVES.labels(side=self.side, source=f"speculative_{source}" if speculative else source).inc()
+        return result
+
+    async def _decide(self,
+                      board: chess.Board,
+                      agent: AssistantAgent,
+                      speculative: bool = False,
+                      last_move: chess.Move | None = None) -> dict:
+        """Pick a move for `board` (side to move is ours); `speculative` calls come from the ponderer."""
+        # 2 ─ Enumerate all legal moves
+        with traced("legal_moves", PHASE_SECONDS, side=self.side, phase="legal_moves"):
+            legal_uci = [m.uci() for m in board.legal_moves]
+        if not legal_uci:  # mate / stalemate
+            return self._answer("error", {"error": "no legal moves"}, speculative)
+
+        # forced or trivially decided position → answer locally, no model call
+        if self.fast_paths is not None:
+            if last_move is None and board.move_stack:
+                last_move = board.peek()
+            with traced("fast_path", PHASE_SECONDS, side=self.side, phase="fast_path"):
+                decided = self.fast_paths.decide(board, last_move)
+            if decided is not None:
+                rule, move = decided
+                log.info("[%s] Fast path %s: %s", self.tag, rule, move.uci())
+                return self._answer("fast_path", {"uci": move.uci()}, speculative)
+
+        # known opening position → answer from the book, no model call
+        if self.book is not None:
+            with traced("book", PHASE_SECONDS, side=self.side, phase="book"):
+                book_uci = self.book.lookup(board)
+            if book_uci is not None:
+                log.info("[%s] Book move %s", self.tag, book_uci)
+                return self._answer("book", {"uci": book_uci}, speculative)
+
+        # pondered position → answer computed during the opponent's turn
+        if self.ponderer is not None and not speculative:
+            with traced("ponder", PHASE_SECONDS, side=self.side, phase="ponder"):
+                pondered = await self.ponderer.take(board)
+            if pondered is not None and "uci" in pondered:
+                log.info("[%s] Ponder hit %s (%s)", self.tag, pondered["uci"], self.ponderer.stats(self.color))
+                return self._answer("ponder", pondered)
+
+        # repeated position → answer from the cache, no model call
+        with traced("cache", PHASE_SECONDS, side=self.side, phase="cache"):
+            cached = self.cache.get(board)
+        if cached is not None:
+            log.info("[%s] Cache hit %s (%s)", self.tag, cached, self.cache.stats())
+            return self._answer("cache", {"uci": cached}, speculative)
+
+        # 3 ─ Compose the prompt with an explicit menu, pruned to the statically best top_k
+        with traced("prompt", PHASE_SECONDS, side=self.side, phase="prompt"):
+            menu = legal_uci
+            if self.top_k and len(legal_uci) > self.top_k:
+                menu = [m.uci() for m in top_moves(board, self.top_k)]
+            ranked = min(self.candidates, len(menu))
+            recent = ""
+            if self.history_plies and board.move_stack:
+                recent = f"Recent moves: {' '.join(m.uci() for m in board.move_stack[-self.history_plies:])}\n"
+            if ranked > 1:
+                prompt = (
+                    f"You are {self.side.upper()}. FEN: {board.fen()}\n{recent}"
+                    f"Instead of a single move, rank your {ranked} best moves from this list, best first, "
+                    'and output ONLY JSON like {"moves": ["e2e4", "d2d4"]}:\n'
+                    + ", ".join(menu)
+                )
+            else:
+                prompt = (
+                    f"You are {self.side.upper()}. FEN: {board.fen()}\n{recent}"
+                    "Choose ONE BEST move from this list and output it **exactly**:\n"
+                    + ", ".join(menu)
+                )
+
+        # 4 ─ Up to max_retries attempts to get a legal reply; a ranked reply
+        #     only needs one legal candidate, tried best first
+        uci = ""
+        mode = "ranked" if ranked > 1 else "single"
+
+        def has_legal(result: CreateResult) -> bool:
+            # lets a hedged model client prefer a legal answer over a faster illegal one
+            return not isinstance(result.content, str) or any(
+                m in legal_uci for m in proposed_moves(result.content, ranked > 1))
+
+        for attempt in range(self.max_retries):
+            if attempt:
+                RETRIES.labels(side=self.side).inc()
+            accept = accept_reply.set(has_legal)
+            try:
+                with traced("model", PHASE_SECONDS, side=self.side, phase="model") as call:
+                    call.set(attempt=attempt + 1)
+                    call_started = time.perf_counter()
+                    resp = await agent.run(task=prompt)
+                    self.model_seconds.append(time.perf_counter() - call_started)
+                    call.set(reply=str(resp.messages[-1].content)[:200])
+            finally:
+                accept_reply.reset(accept)
+            self._record_usage(resp.messages[-1].models_usage)
+            proposed = proposed_moves(resp.messages[-1].content, ranked > 1)
+            uci = next((m for m in proposed if m in legal_uci), proposed[0])
+
+            if uci in legal_uci:
+                log.info("[%s] Accepted move %s", self.tag, uci)
+                self.model_moves += 1
+                ROUND_TRIPS.labels(side=self.side, mode=mode).observe(attempt + 1)
+                self.cache.put(board, uci)
+                return self._answer("model", {"uci": uci}, speculative)
+
+            ILLEGAL_REPLIES.labels(side=self.side).inc()
+            # feedback loop for the LLM
+            if ranked > 1:
+                prompt = (
+                    f"None of {', '.join(proposed)} is legal or in the list.\n"
+                    f'Rank your {ranked} best moves as JSON {{"moves": [...]}}, picking ONLY from: '
+                    + ", ".join(menu)
+                )
+            else:
+                prompt = (
+                    f"That move:{uci} is illegal or not in the list.\n"
+                    "Pick ONE move from: " + ", ".join(menu)
+                )
+
+        # 5 ─ Give up after max_retries bad tries
+        log.warning("[%s] Too many illegal replies: %s", self.tag, uci)
+        return self._answer("error", {"error": f"illegal move {uci} (max retries exceeded)"}, speculative)
+
+    def _record_usage(self, usage: RequestUsage | None) -> None:
+        self.model_calls += 1
+        MODEL_CALLS.labels(side=self.side).inc()
+        if usage is None:
+            return
+        self.prompt_tokens_last = usage.prompt_tokens
+        self.prompt_tokens_total += usage.prompt_tokens
+        self.prompt_tokens_max = max(self.prompt_tokens_max, usage.prompt_tokens)
+        TOKENS.labels(side=self.side, kind="prompt").inc(usage.prompt_tokens)
+        TOKENS.labels(side=self.side, kind="completion").inc(usage.completion_tokens)
+        PROMPT_TOKENS.labels(side=self.side).observe(usage.prompt_tokens)
+        log.info("[%s] Model call %d: %d prompt tokens", self.tag, self.model_calls, usage.prompt_tokens)
+
+    def stats(self) -> dict:
+        """Counters of the shortcuts that avoid model calls, round-trips and prompt size per model call."""
+        model_seconds = sorted(self.model_seconds)
+        return {
+            "model": {
+                "calls": self.model_calls,
+                "mode": f"ranked-{self.candidates}" if self.candidates > 1 else "single",
+                "accepted": self.model_moves,
+                # every model call, including those of moves that failed, per move the model got right
+                "round_trips_per_move": round(self.model_calls / self.model_moves, 3) if self.model_moves else 0.0,
+                "prompt_tokens_last": self.prompt_tokens_last,
+                "prompt_tokens_max": self.prompt_tokens_max,
+                "prompt_tokens_avg": round(self.prompt_tokens_total / self.model_calls, 1) if self.model_calls else 0.0,
+                "p99_s": round(model_seconds[int(0.99 * (len(model_seconds) - 1))], 3) if model_seconds else 0.0,
+            },
+            "hedging": self.model_client.stats() if isinstance(self.model_client, HedgedChatCompletionClient) else None,
+            "rate_limit": self._rate_limit_stats(),
+            "context": self.contexts.stats(),
+            "fast_paths": self.fast_paths.stats() if self.fast_paths is not None else None,
+            "cache": self.cache.stats(),
+            "book": self.book.stats() if self.book is not None else None,
+            "ponder": self.ponderer.stats(self.color) if self.ponderer is not None else None,
+        }
+
+    def _rate_limit_stats(self) -> dict | None:
+        clients = [self.model_client]
+        if isinstance(self.model_client, HedgedChatCompletionClient):
+            clients = [self.model_client.primary, *self.model_client.alternates]
+        limited = {c.name: c.stats() for c in clients if isinstance(c, RateLimitedChatCompletionClient)}
+        return limited or None
+
+    async def choose_moves(self,
+                           fens: Sequence[str],
+                           max_in_flight: int = 8) -> AsyncIterator[tuple[int, dict]]:
+        """Answer many positions concurrently, yielding (index, result) as each one finishes.
+
+        Every position gets its own agent so concurrent model calls never share
+        a conversation; at most `max_in_flight` positions are worked on at once.
+        """
+        limit = asyncio.Semaphore(max(1, max_in_flight))
+
+        async def one(index: int, fen: str) -> tuple[int, dict]:
+            async with limit:
+                try:
+                    return index, await self.choose_move(fen, agent=self.new_agent(), ponder=False)
+                except Exception as e:
+                    log.exception("[%s] Batch move failed for %s", self.tag, fen)
+                    return index, {"error": f"{type(e).__name__}: {e}"}
+
+        tasks = [asyncio.create_task(one(i, fen)) for i, fen in enumerate(fens)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
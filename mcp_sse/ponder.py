@@ -0,0 +1,118 @@
+"""Pondering: answer the opponent's most likely replies before they are played.
+
+After the agent answers a position it knows the position the opponent now
+faces. `Ponderer.schedule` takes the opponent's `width` best replies by
+static evaluation (mcp_sse/evaluator.py) as the likeliest ones and starts
+solving each resulting position in the background. When the real request
+arrives and matches one of them, `Ponderer.take` serves (or awaits) that
+speculative answer and cancels its siblings.
+
+Positions are grouped by the opponent-to-move position they came from.
+Groups that are never matched (another game, an unexpected reply) are
+dropped after `ttl` seconds or when more than `max_groups` are pending, and
+every unused speculative position counts as wasted.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+import chess
+
+from mcp_sse.evaluator import top_moves
+from mcp_sse.move_cache import position_key
+
+log = logging.getLogger(__name__)
+
+
+class Ponderer:
+    """Speculative answers for predicted positions, with hit/waste accounting."""
+
+    def __init__(self, width: int = 2, ttl: float = 120.0, max_groups: int = 64):
+        self.width = width
+        self.ttl = ttl
+        self.max_groups = max_groups
+        # speculative position key → (group key, task)
+        self._tasks: dict[str, tuple[str, asyncio.Task]] = {}
+        # group key → (created, side to move in the speculative positions, their keys)
+        self._groups: OrderedDict[str, tuple[float, chess.Color, list[str]]] = OrderedDict()
+        self.scheduled = 0
+        # per side: one server may ponder for both colors, and a lookup only misses
+        # when something was pondered for the side asking
+        self.hits = {chess.WHITE: 0, chess.BLACK: 0}
+        self.misses = {chess.WHITE: 0, chess.BLACK: 0}
+        self.wasted = 0
+
+    def schedule(self, board: chess.Board, solve: Callable[[chess.Board], Awaitable[dict]]) -> None:
+        """Start solving the positions after the opponent's likely replies in `board`."""
+        self._expire()
+        group = position_key(board)
+        if group in self._groups or board.is_game_over():
+            return
+        children = []
+        for reply in top_moves(board, self.width):
+            child = board.copy(stack=False)
+            child.push(reply)
+            key = position_key(child)
+            if key in self._tasks:
+                continue
+            self._tasks[key] = (group, asyncio.create_task(solve(child)))
+            children.append(key)
+            self.scheduled += 1
+        self._groups[group] = (time.monotonic(), not board.turn, children)
+
+    async def take(self, board: chess.Board) -> dict | None:
+        """Return the speculative answer for `board`, or None if it was not pondered."""
+        key = position_key(board)
+        entry = self._tasks.pop(key, None)
+        if entry is None:
+            if any(side == board.turn for _, side, _ in self._groups.values()):
+                self.misses[board.turn] += 1
+            return None
+        group, task = entry
+        self._discard(group, keep=key)
+        try:
+            answer = await task
+        except Exception as e:
+            log.warning("Ponder task failed for %s: %s", key, e)
+            answer = None
+        # a hit only when the speculative answer is a move the caller can play
+        if answer is not None and "uci" in answer:
+            self.hits[board.turn] += 1
+        else:
+            self.misses[board.turn] += 1
+        return answer
+
+    def _discard(self, group: str, keep: str | None = None) -> None:
+        _, _, children = self._groups.pop(group, (0.0, chess.WHITE, []))
+        for key in children:
+            if key == keep:
+                continue
+            entry = self._tasks.pop(key, None)
+            if entry is not None:
+                entry[1].cancel()
+                self.wasted += 1
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        while self._groups:
+            group, (created, _, _) = next(iter(self._groups.items()))
+            if now - created < self.ttl and len(self._groups) < self.max_groups:
+                break
+            self._discard(group)
+
+    def stats(self, side: chess.Color | None = None) -> dict:
+        """Counters for `side`, or for both sides together."""
+        sides = [chess.WHITE, chess.BLACK] if side is None else [side]
+        hits = sum(self.hits[s] for s in sides)
+        misses = sum(self.misses[s] for s in sides)
+        real = hits + misses
+        return {
+            "scheduled": self.scheduled,
+            "hits": hits,
+            "misses": misses,
+            "wasted": self.wasted,
+            "pending": len(self._tasks),
+            "hit_rate": round(hits / real, 4) if real else 0.0,
+        }
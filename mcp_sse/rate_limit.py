@@ -0,0 +1,270 @@
+"""Client-side RPM / TPM budgets for one model deployment.
+
+`RateLimitedChatCompletionClient` wraps a deployment's client and admits a
+request only when both token buckets have room for it:
+
+  • requests — refilled at `rpm` per minute;
+  • tokens   — refilled at `tpm` per minute. A request is charged an
+               estimate up front (prompt characters / 4 plus
+               `completion_tokens`, as tiktoken may need network access)
+               and the difference to the reported usage afterwards.
+
+Buckets hold `burst_seconds` worth of budget, matching Azure OpenAI, which
+enforces its per-minute quota over shorter windows. Requests that do not fit
+wait in a priority queue, served strictly in order of the key in the
+`request_priority` context variable (lower first; ChessPlayer uses
+`move_priority`: moves with the nearest deadline, then games furthest
+along, then speculative ponder work). A 429 that still gets through pauses
+the whole deployment for its Retry-After, its quota is handed back and the
+request is queued again at the front of its priority. The wrapped client
+should not retry 429s itself (agent_server.py builds it with
+``max_retries=0``), or the SDK's own backoff runs before this one.
+
+    MODEL_RPM=300 MODEL_TPM=60000 uv run ./mcp_sse/agent_server.py
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import math
+import time
+from contextvars import ContextVar
+from typing import Any, AsyncGenerator, Mapping, Optional, Sequence, Union
+
+from autogen_core import CancellationToken
+from autogen_core.models import (ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities,
+                                 ModelInfo, RequestUsage)
+from autogen_core.tools import Tool, ToolSchema
+from openai import RateLimitError
+from pydantic import BaseModel
+
+from mcp_sse.metrics import counter, gauge, histogram
+from mcp_sse.tracing import span
+
+log = logging.getLogger(__name__)
+
+QUEUED = gauge("chess_agent_rate_limit_queued", "Model requests waiting for quota", ["deployment"])
+WAIT_SECONDS = histogram("chess_agent_rate_limit_wait_seconds", "Time a model request waited for quota",
+                         ["deployment"])
+THROTTLED = counter("chess_agent_throttled_total", "Model requests answered with HTTP 429", ["deployment"])
+
+# scheduling key of the model requests made in this context; lower keys are served first
+request_priority: ContextVar[tuple] = ContextVar("request_priority", default=(1, math.inf, 0))
+
+
+def move_priority(deadline: float | None, ply: int, speculative: bool = False) -> tuple:
+    """Key for a move request: real moves before ponder work, then earliest deadline, then latest ply."""
+    return (1 if speculative else 0, math.inf if deadline is None else deadline, -ply)
+
+
+def estimate_tokens(messages: Sequence[LLMMessage]) -> int:
+    """Rough prompt size: about four characters per token."""
+    chars = 0
+    for message in messages:
+        content = getattr(message, "content", "")
+        chars += len(content) if isinstance(content, str) else len(str(content))
+    return chars // 4 + 4 * len(messages)
+
+
+def retry_after(error: RateLimitError, default: float) -> float:
+    """Seconds to back off, from the retry-after-ms / retry-after headers of a 429."""
+    headers = error.response.headers if error.response is not None else {}
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return max(0.0, float(headers[name]) * scale)
+        except (KeyError, TypeError, ValueError):
+            continue
+    return default
+
+
+class TokenBucket:
+    """`rate` units per second, up to `capacity` banked; a rate of 0 means unlimited."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """Seconds until `amount` is available (0 if it is now)."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        # a request larger than the bucket only waits for a full bucket
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate)
+
+    def take(self, amount: float, now: float) -> None:
+        if self.rate:
+            self._refill(now)
+            self.level -= amount
+
+    def give(self, amount: float) -> None:
+        if self.rate:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimitedChatCompletionClient(ChatCompletionClient):
+    """A deployment's client behind request and token buckets and a priority queue."""
+
+    def __init__(self,
+                 client: ChatCompletionClient,
+                 rpm: float = 0,
+                 tpm: float = 0,
+                 name: str = "primary",
+                 burst_seconds: float = 10.0,
+                 completion_tokens: int = 16,
+                 max_throttle_retries: int = 5,
+                 default_retry_after: float = 1.0):
+        self.client = client
+        self.name = name
+        self.requests = TokenBucket(rpm / 60, max(1.0, rpm * burst_seconds / 60))
+        self.tokens = TokenBucket(tpm / 60, max(1.0, tpm * burst_seconds / 60))
+        self.completion_tokens = completion_tokens
+        self.max_throttle_retries = max_throttle_retries
+        self.default_retry_after = default_retry_after
+        # (priority, sequence, tokens, future) of requests waiting for quota
+        self._queue: list[tuple[tuple, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+        self.admitted = 0
+        self.queued = 0
+        self.throttled = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def _acquire(self, tokens: int, priority: tuple, sequence: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, sequence, tokens, future))
+        QUEUED.labels(deployment=self.name).set(len(self._queue))
+        self._dispatch()
+        if not future.done():
+            self.queued += 1
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # admitted just as the caller gave up: hand the quota back
+                self.requests.give(1)
+                self.tokens.give(tokens)
+            else:
+                self._queue = [entry for entry in self._queue if entry[3] is not future]
+                heapq.heapify(self._queue)
+                QUEUED.labels(deployment=self.name).set(len(self._queue))
+                self._dispatch()
+            raise
+
+    def _dispatch(self) -> None:
+        """Admit queued requests in priority order while both buckets have room."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._queue:
+            now = time.monotonic()
+            _, _, tokens, future = self._queue[0]
+            if future.done():
+                heapq.heappop(self._queue)
+                continue
+            delay = max(self._paused_until - now, self.requests.delay(1, now), self.tokens.delay(tokens, now))
+            if delay > 0:
+                # strict priority: nothing behind the head may use the quota it is waiting for
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                break
+            heapq.heappop(self._queue)
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+            future.set_result(None)
+        QUEUED.labels(deployment=self.name).set(len(self._queue))
+
+    async def create(self,
+                     messages: Sequence[LLMMessage],
+                     *,
+                     tools: Sequence[Tool | ToolSchema] = [],
+                     json_output: Optional[bool | type[BaseModel]] = None,
+                     extra_create_args: Mapping[str, Any] = {},
+                     cancellation_token: Optional[CancellationToken] = None) -> CreateResult:
+        estimate = estimate_tokens(messages) + int(extra_create_args.get("max_tokens", self.completion_tokens))
+        priority = request_priority.get()
+        # a throttled request keeps its place: same priority and sequence number
+        sequence = next(self._sequence)
+        started = time.perf_counter()
+        for attempt in range(self.max_throttle_retries + 1):
+            with span("rate_limit.wait", deployment=self.name, attempt=attempt + 1):
+                await self._acquire(estimate, priority, sequence)
+            waited = time.perf_counter() - started
+            try:
+                result = await self.client.create(messages, tools=tools, json_output=json_output,
+                                                  extra_create_args=extra_create_args,
+                                                  cancellation_token=cancellation_token)
+            except RateLimitError as e:
+                # the deployment did not serve it: the quota taken for it is still ours
+                self.requests.give(1)
+                self.tokens.give(estimate)
+                self.throttled += 1
+                THROTTLED.labels(deployment=self.name).inc()
+                pause = retry_after(e, self.default_retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                log.warning("Deployment %s throttled (429); pausing %.2fs", self.name, pause)
+                if attempt == self.max_throttle_retries:
+                    raise
+                continue
+            self.admitted += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            WAIT_SECONDS.labels(deployment=self.name).observe(waited)
+            if result.usage is not None:
+                # settle the estimate against what the request actually used
+                self.tokens.give(estimate - result.usage.prompt_tokens - result.usage.completion_tokens)
+            return result
+        raise AssertionError("unreachable")
+
+    def stats(self) -> dict:
+        return {
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "waiting": len(self._queue),
+            "throttled": self.throttled,
+            "wait_avg_s": round(self.wait_total / self.admitted, 3) if self.admitted else 0.0,
+            "wait_max_s": round(self.wait_max, 3),
+        }
+
+    def create_stream(self,
+                      messages: Sequence[LLMMessage],
+                      *,
+                      tools: Sequence[Tool | ToolSchema] = [],
+                      json_output: Optional[bool | type[BaseModel]] = None,
+                      extra_create_args: Mapping[str, Any] = {},
+                      cancellation_token: Optional[CancellationToken] = None) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # streams are not rate limited
+        return self.client.create_stream(messages, tools=tools, json_output=json_output,
+                                         extra_create_args=extra_create_args,
+                                         cancellation_token=cancellation_token)
+
+    async def close(self) -> None:
+        await self.client.close()
+
+    def actual_usage(self) -> RequestUsage:
+        return self.client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self.client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self.client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore[override]
+        return self.client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self.client.model_info
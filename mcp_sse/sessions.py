@@ -0,0 +1,153 @@
+"""Per-game sessions of the SSE agents: move deltas instead of a FEN per call.
+
+With the plain `move` tool every request carries a full FEN, so the agent
+parses a new board each time and knows nothing of how the game got there.
+A session keeps the game's board in the agent instead:
+
+    open_session(moves=[...])                  → {"session_id": "…", "ply": 12}
+    session_move(session_id, moves=["e7e5"], ply=13) → {"uci": "g1f3"}
+    close_session(session_id)
+
+`moves` lists the plies played since the previous call, which is usually the
+agent's own last move (as actually played) and the opponent's reply. They are
+pushed onto the session's board in place, so the move stack, and with it the
+recapture shortcut and the prompt's recent moves, carries over between
+calls, and the session id doubles as the game id for the model context.
+`ply` is what the orchestrator believes the ply count is afterwards; a delta
+that does not fit (lost reply, illegal move) closes the session and answers
+{"error": …, "resync": true}, and the orchestrator reopens it from the full
+move list.
+
+`SessionStore` drops sessions idle for `ttl` seconds and, beyond
+`max_sessions`, the least recently used ones, so abandoned games cannot grow
+the agent's memory.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable
+
+import chess
+
+from mcp_sse.metrics import counter, gauge
+
+log = logging.getLogger(__name__)
+
+SESSIONS = gauge("chess_agent_sessions", "Open game sessions")
+SESSIONS_CLOSED = counter("chess_agent_sessions_closed_total", "Game sessions closed", ["reason"])
+
+
+class SessionError(Exception):
+    """A session request that cannot be applied; the caller has to reopen the session."""
+
+
+class GameSession:
+    """One game's board as this agent has seen it."""
+
+    def __init__(self, session_id: str, board: chess.Board):
+        self.session_id = session_id
+        self.board = board
+        self.used = time.monotonic()
+        # one request at a time: a late reply still being computed must not see the board move on
+        self.lock = asyncio.Lock()
+
+    def apply(self, moves: list[str], ply: int | None = None) -> None:
+        """Push the plies played since the last request; raises SessionError if they do not fit."""
+        board = self.board
+        if ply is not None and board.ply() + len(moves) != ply:
+            raise SessionError(f"session is at ply {board.ply()}, {len(moves)} move(s) do not reach ply {ply}")
+        for uci in moves:
+            try:
+                move = chess.Move.from_uci(uci)
+            except ValueError:
+                raise SessionError(f"malformed move {uci!r}") from None
+            if not board.is_legal(move):
+                raise SessionError(f"illegal move {uci} at ply {board.ply()}")
+            board.push(move)
+
+
+class SessionStore:
+    """Open sessions, dropped after `ttl` idle seconds or beyond `max_sessions` (least recently used first)."""
+
+    def __init__(self, ttl: float = 600.0, max_sessions: int = 1024,
+                 on_close: Callable[[str], None] | None = None):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        # called with the session id of every session that goes away, e.g. to drop its model context
+        self.on_close = on_close
+        self._sessions: OrderedDict[str, GameSession] = OrderedDict()
+        self.opened = 0
+        self.expired = 0
+        self.evicted = 0
+        self.resyncs = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def open(self, fen: str | None = None, moves: list[str] | None = None) -> GameSession:
+        """A new session at `fen` (default: the start position) after `moves`."""
+        self.expire()
+        try:
+            board = chess.Board(fen) if fen else chess.Board()
+        except ValueError as e:
+            raise SessionError(f"Invalid FEN: {e}") from None
+        session = GameSession(uuid.uuid4().hex, board)
+        session.apply(moves or [])
+        self._sessions[session.session_id] = session
+        self.opened += 1
+        while len(self._sessions) > self.max_sessions:
+            self._drop(next(iter(self._sessions)), "evicted")
+            self.evicted += 1
+        SESSIONS.set(len(self._sessions))
+        return session
+
+    def get(self, session_id: str) -> GameSession:
+        """The live session `session_id`, marked as used; raises SessionError if it is gone."""
+        self.expire()
+        session = self._sessions.get(session_id)
+        if session is None:
+            raise SessionError(f"unknown or expired session {session_id}")
+        session.used = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def resync(self, session_id: str) -> None:
+        """Drop a session whose board no longer matches the orchestrator's."""
+        self.resyncs += 1
+        self._drop(session_id, "resync")
+
+    def close(self, session_id: str) -> bool:
+        return self._drop(session_id, "closed")
+
+    def expire(self) -> None:
+        """Drop sessions idle for longer than `ttl`; the oldest come first, so this stops at the first live one."""
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.used > cutoff:
+                break
+            self._drop(session_id, "expired")
+            self.expired += 1
+
+    def _drop(self, session_id: str, reason: str) -> bool:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return False
+        SESSIONS.set(len(self._sessions))
+        SESSIONS_CLOSED.labels(reason=reason).inc()
+        log.info("Session %s %s after %d plies", session_id, reason, session.board.ply())
+        if self.on_close is not None:
+            self.on_close(session_id)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "open": len(self._sessions),
+            "opened": self.opened,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "resyncs": self.resyncs,
+            "ttl_s": self.ttl,
+        }
@@ -0,0 +1,125 @@
+"""Live game events for spectators, served as Server-Sent Events.
+
+The orchestrator publishes one event per game start, ply, agent error and
+game end to an `EventHub`; `GET /events` on its HTTP server (METRICS_PORT,
+loopback only unless METRICS_HOST is set) streams them to any number of
+viewers, optionally only those of one game:
+
+    curl -N http://localhost:9000/events
+    curl -N "http://localhost:9000/events?game=game%203"
+
+    event: ply
+    data: {"game": "game 3", "ply": 17, "uci": "e2e4", "fen": "…", "seconds": 0.41, …}
+
+Publishing never waits for a viewer: each event is serialized once and put
+on every subscriber's bounded queue without blocking. A subscriber whose
+queue is full has fallen `queue_size` events behind; it is dropped (its
+stream ends with a "dropped" event) instead of holding up the games.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from mcp_sse.metrics import counter, gauge
+
+log = logging.getLogger("board")
+
+SPECTATORS = gauge("chess_board_spectators", "Connected event stream subscribers")
+EVENTS_PUBLISHED = counter("chess_board_events_total", "Spectator events published", ["event"])
+SPECTATORS_DROPPED = counter("chess_board_spectators_dropped_total", "Subscribers dropped for falling behind")
+
+
+class Subscriber:
+    """One viewer's bounded queue of serialized events."""
+
+    def __init__(self, game: str | None, queue_size: int):
+        self.game = game
+        self.queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+
+class EventHub:
+    """Fans events out to subscribers without ever waiting for one."""
+
+    def __init__(self, queue_size: int = 256, keepalive: float = 15.0):
+        self.queue_size = queue_size
+        # seconds of silence after which a comment line keeps proxies from closing the stream
+        self.keepalive = keepalive
+        self._subscribers: set[Subscriber] = set()
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, game: str, **fields) -> None:
+        """Send `event` of `game` to every matching subscriber; costs nothing without subscribers."""
+        EVENTS_PUBLISHED.labels(event=event).inc()
+        if not self._subscribers:
+            return
+        message = f"event: {event}\ndata: {json.dumps({'game': game, 'time': time.time(), **fields})}\n\n"
+        for subscriber in list(self._subscribers):
+            if subscriber.game is not None and subscriber.game != game:
+                continue
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                self._drop(subscriber)
+
+    def subscribe(self, game: str | None = None) -> Subscriber:
+        subscriber = Subscriber(game, self.queue_size)
+        self._subscribers.add(subscriber)
+        SPECTATORS.set(len(self._subscribers))
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        self._subscribers.discard(subscriber)
+        SPECTATORS.set(len(self._subscribers))
+
+    def close(self) -> None:
+        """End every stream, e.g. before the HTTP server shuts down."""
+        for subscriber in list(self._subscribers):
+            self._end(subscriber)
+
+    def _drop(self, subscriber: Subscriber) -> None:
+        subscriber.dropped = True
+        SPECTATORS_DROPPED.inc()
+        log.warning(f"Dropped a spectator {self.queue_size} events behind")
+        # the viewer has lost events anyway; make room for the end-of-stream marker
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        self._end(subscriber)
+
+    def _end(self, subscriber: Subscriber) -> None:
+        self.unsubscribe(subscriber)
+        try:
+            subscriber.queue.put_nowait(None)
+        except asyncio.QueueFull:
+            # a full queue is drained first; the marker goes in place of the oldest event
+            subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+
+    async def stream(self, subscriber: Subscriber):
+        """The subscriber's events as SSE text, until it is dropped or disconnects."""
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), self.keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    if subscriber.dropped:
+                        yield f"event: dropped\ndata: {json.dumps({'queue_size': self.queue_size})}\n\n"
+                    return
+                yield message
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def endpoint(self, request: Request) -> StreamingResponse:
+        subscriber = self.subscribe(request.query_params.get("game"))
+        return StreamingResponse(self.stream(subscriber), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
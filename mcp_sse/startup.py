@@ -0,0 +1,108 @@
+"""Startup timing, readiness and connection pre-warming for the SSE agents.
+
+`Startup` records when each startup phase finished, in seconds since the
+process started (interpreter start included where /proc is available), as
+chess_agent_startup_seconds{phase}, and backs the /ready route: 503 with the
+phases so far until `set_ready`, 200 afterwards.
+
+`prewarm` opens connections to every deployment behind a model client
+(unwrapping hedged and rate-limited clients) so the first move does not pay
+DNS, TCP and TLS setup. Any HTTP answer counts: the request only has to leave
+a live connection in the client's pool.
+
+This module imports nothing heavy, so it can be loaded before the agent's
+model stack.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from mcp_sse.metrics import gauge
+
+log = logging.getLogger(__name__)
+
+STARTUP_SECONDS = gauge("chess_agent_startup_seconds", "Seconds from process start to the end of a startup phase",
+                        ["phase"])
+READY = gauge("chess_agent_ready", "1 once the agent is warm and accepts moves")
+
+
+def process_age() -> float:
+    """Seconds since this process started (Linux /proc; 0 elsewhere)."""
+    try:
+        with open("/proc/self/stat") as f:
+            # the command name may contain spaces; starttime is the 20th field after its closing ')'
+            started_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return max(0.0, uptime - started_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, IndexError, ValueError):
+        return 0.0
+
+
+class Startup:
+    """Phase timings and the ready flag of one agent process."""
+
+    def __init__(self):
+        self.started = time.monotonic() - process_age()
+        self.phases: dict[str, float] = {}
+        self.ready = asyncio.Event()
+        READY.set(0)
+
+    def mark(self, phase: str) -> float:
+        """Record that `phase` just finished; returns seconds since process start."""
+        elapsed = time.monotonic() - self.started
+        self.phases[phase] = round(elapsed, 3)
+        STARTUP_SECONDS.labels(phase=phase).set(elapsed)
+        log.info("Startup phase %s done after %.3fs", phase, elapsed)
+        return elapsed
+
+    def set_ready(self) -> None:
+        self.mark("ready")
+        READY.set(1)
+        self.ready.set()
+
+    async def endpoint(self, request: Request) -> JSONResponse:
+        return JSONResponse({"ready": self.ready.is_set(), "startup_s": self.phases},
+                            status_code=200 if self.ready.is_set() else 503)
+
+
+def deployment_clients(client: Any) -> list[Any]:
+    """The per-deployment clients behind hedging / rate-limiting wrappers."""
+    if hasattr(client, "primary") and hasattr(client, "alternates"):
+        return [c for inner in (client.primary, *client.alternates) for c in deployment_clients(inner)]
+    if hasattr(client, "client"):
+        return deployment_clients(client.client)
+    return [client]
+
+
+async def prewarm(client: Any, connections: int = 2, attempts: int = 5, backoff: float = 1.0) -> int:
+    """Open `connections` pooled connections per deployment; returns how many deployments answered."""
+    import openai
+
+    async def touch(raw: Any) -> None:
+        try:
+            await raw.models.list()
+        except openai.APIStatusError:
+            # an HTTP error status still leaves a live connection behind
+            pass
+
+    warmed = 0
+    for deployment in deployment_clients(client):
+        # autogen's OpenAI clients keep the openai SDK client, and with it the httpx pool, in `_client`
+        raw = getattr(deployment, "_client", None)
+        if raw is None:
+            continue
+        for attempt in range(1, attempts + 1):
+            try:
+                await asyncio.gather(*(touch(raw) for _ in range(max(1, connections))))
+                warmed += 1
+                break
+            except openai.APIConnectionError as e:
+                log.warning("Pre-warming %s failed (attempt %d/%d): %r", raw.base_url, attempt, attempts, e)
+                await asyncio.sleep(backoff * attempt)
+    return warmed
@@ -0,0 +1,402 @@
+"""Distributed tracing of each ply across the orchestrator, the MCP transport and the agents.
+
+A trace follows one ply: the orchestrator's "ply" span, one "agent_call" per
+attempt, the pool's "mcp.call_tool" round-trip to a replica, and on the agent
+side "agent.move" with the pipeline phases (parse, legal_moves, fast_path,
+book, ponder, cache, prompt) and one "model" span per model call, retries
+included, down to the rate-limit wait and hedged requests. The context
+crosses the process boundary as a W3C `traceparent` tool argument
+(00-<trace id>-<span id>-<flags>), added by `inject`; agents that do not
+know the argument ignore it.
+
+Spans are handed to a background thread and written in batches, so the
+event loop never waits for an exporter:
+
+  • TRACE_FILE          — JSON lines, one span per line (both processes may
+                          share one file);
+  • TRACE_OTLP_ENDPOINT — OTLP/HTTP JSON to a local collector, e.g.
+                          http://localhost:4318 (Jaeger, otel-collector);
+  • TRACE_SAMPLE        — fraction of plies traced (default 1.0); the
+                          agents follow the orchestrator's decision.
+
+With neither exporter configured `span` costs one attribute check.
+
+    with span("agent_call", parent=ply, attempt=1) as call:
+        reply = await pool.call_tool("move", args)   # pool adds the traceparent
+        call.set(problem="illegal move e2e5")
+
+The slowest plies of a trace file, broken down span by span:
+
+    uv run -m mcp_sse.tracing traces.jsonl --slowest 5
+"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Mapping
+
+from mcp_sse.metrics import Histogram, counter
+
+log = logging.getLogger(__name__)
+
+SPANS_EXPORTED = counter("chess_trace_spans_total", "Spans handed to the exporters")
+SPANS_DROPPED = counter("chess_trace_spans_dropped_total", "Spans dropped because an exporter fell behind")
+
+# OTLP span kinds
+INTERNAL, SERVER, CLIENT = 1, 2, 3
+
+TRACEPARENT_RE = re.compile(r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})(-.*)?$")
+
+
+def parse_traceparent(header: str | None) -> tuple[str, str, bool] | None:
+    """(trace id, parent span id, sampled) of a W3C traceparent, or None if it is missing or invalid."""
+    match = TRACEPARENT_RE.match((header or "").strip().lower())
+    if match is None:
+        return None
+    version, trace_id, span_id, flags, rest = match.groups()
+    if version == "ff" or (version == "00" and rest) or trace_id == "0" * 32 or span_id == "0" * 16:
+        return None
+    return trace_id, span_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """One timed operation; recorded spans are exported when they end."""
+
+    __slots__ = ("tracer", "trace_id", "span_id", "parent_id", "name", "kind", "sampled",
+                 "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, tracer: "Tracer | None", name: str, trace_id: str, parent_id: str | None,
+                 sampled: bool, kind: int = INTERNAL, attributes: Mapping[str, Any] | None = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.kind = kind
+        self.attributes = dict(attributes or {}) if sampled else {}
+        self.error: str | None = None
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, **attributes: Any) -> None:
+        if self.sampled:
+            self.attributes.update(attributes)
+
+    def fail(self, error: str) -> None:
+        self.error = error
+
+    def end(self) -> None:
+        """Finish the span; later calls do nothing."""
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled and self.tracer is not None:
+            self.tracer.export(self)
+
+    def record(self, service: str) -> dict:
+        """The span as one JSON-lines record."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": service,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "attributes": {k: v for k, v in self.attributes.items() if v is not None},
+            "error": self.error,
+        }
+
+
+# the span new spans are children of, per task
+_current: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+# what every span is while tracing is off, and under `untraced`
+NOOP = Span(None, "noop", "0" * 32, None, sampled=False)
+
+
+class BatchExporter:
+    """Collects spans and writes them from a background thread every `interval` seconds."""
+
+    def __init__(self, interval: float = 1.0, max_pending: int = 10000):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending: deque[dict] = deque()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+        self._thread.start()
+
+    def export(self, record: dict) -> None:
+        if len(self._pending) >= self.max_pending:
+            SPANS_DROPPED.inc()
+            return
+        self._pending.append(record)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def flush(self) -> None:
+        batch = []
+        while self._pending:
+            batch.append(self._pending.popleft())
+        if not batch:
+            return
+        try:
+            self.write(batch)
+        except Exception as e:
+            SPANS_DROPPED.inc(len(batch))
+            log.warning("%s lost %d spans: %r", type(self).__name__, len(batch), e)
+
+    def write(self, batch: list[dict]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self.flush()
+
+
+class JsonlExporter(BatchExporter):
+    """Appends one JSON line per span to `path`."""
+
+    def __init__(self, path: str, **kwargs):
+        self.path = path
+        super().__init__(**kwargs)
+
+    def write(self, batch: list[dict]) -> None:
+        # one unbuffered append per batch, so processes sharing the file never split a line
+        with open(self.path, "ab", buffering=0) as f:
+            f.write("".join(json.dumps(record) + "\n" for record in batch).encode())
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpExporter(BatchExporter):
+    """Posts spans to an OTLP/HTTP collector (JSON encoding) at `endpoint`/v1/traces."""
+
+    def __init__(self, endpoint: str, timeout: float = 5.0, **kwargs):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def write(self, batch: list[dict]) -> None:
+        by_service: dict[str, list[dict]] = defaultdict(list)
+        for record in batch:
+            by_service[record["service"]].append({
+                "traceId": record["trace_id"],
+                "spanId": record["span_id"],
+                "parentSpanId": record["parent_id"] or "",
+                "name": record["name"],
+                "kind": record["kind"],
+                "startTimeUnixNano": str(record["start_ns"]),
+                "endTimeUnixNano": str(record["end_ns"]),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in record["attributes"].items()],
+                "status": {"code": 2, "message": record["error"]} if record["error"] else {"code": 1},
+            })
+        body = {"resourceSpans": [
+            {"resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+             "scopeSpans": [{"scope": {"name": "mcp_sse"}, "spans": spans}]}
+            for service, spans in by_service.items()
+        ]}
+        request = urllib.request.Request(self.url, data=json.dumps(body).encode(), method="POST",
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class Tracer:
+    """Starts spans, samples new traces and hands finished spans to the exporters."""
+
+    def __init__(self, service: str = "chess", exporters: list[BatchExporter] | None = None, sample: float = 1.0):
+        self.service = service
+        self.exporters = exporters or []
+        self.sample = sample
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def start(self, name: str, parent: Span | str | None = None, kind: int = INTERNAL, **attributes: Any) -> Span:
+        """A started span under `parent` (a span, a traceparent, or by default the current span).
+
+        The caller ends it; it does not become the current span. Without a
+        parent it starts a new trace, sampled with probability `sample`.
+        """
+        if not self.enabled:
+            return NOOP
+        if parent is None:
+            parent = _current.get()
+        if isinstance(parent, str):
+            context = parse_traceparent(parent)
+            if context is not None:
+                return Span(self, name, context[0], context[1], context[2], kind, attributes)
+            parent = None
+        if parent is None:
+            return Span(self, name, os.urandom(16).hex(), None, random.random() < self.sample, kind, attributes)
+        if parent is NOOP:
+            return NOOP
+        # children of a trace that was not sampled are not recorded either, but pass the decision on
+        return Span(self, name, parent.trace_id, parent.span_id, parent.sampled, kind, attributes)
+
+    @contextmanager
+    def span(self, name: str, parent: Span | str | None = None, kind: int = INTERNAL,
+             **attributes: Any) -> Iterator[Span]:
+        """A span around the block, current for everything started inside it (tasks included)."""
+        if not self.enabled:
+            yield NOOP
+            return
+        span = self.start(name, parent, kind, **attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(type(e).__name__ if not str(e) else f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            _current.reset(token)
+            span.end()
+
+    def export(self, span: Span) -> None:
+        SPANS_EXPORTED.inc()
+        record = span.record(self.service)
+        for exporter in self.exporters:
+            exporter.export(record)
+
+    def shutdown(self) -> None:
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+TRACER = Tracer()
+
+
+def configure(service: str, path: str = "", otlp_endpoint: str = "", sample: float = 1.0) -> Tracer:
+    """Point the process-wide tracer at its exporters; nothing is traced without one."""
+    exporters: list[BatchExporter] = []
+    if path:
+        exporters.append(JsonlExporter(path))
+    if otlp_endpoint:
+        exporters.append(OtlpExporter(otlp_endpoint))
+    TRACER.shutdown()
+    TRACER.service, TRACER.exporters, TRACER.sample = service, exporters, sample
+    if exporters:
+        # flush what is still pending when the process exits
+        atexit.register(TRACER.shutdown)
+        log.info("Tracing %s (%.0f%% of traces) to %s", service, sample * 100,
+                 ", ".join(filter(None, (path, otlp_endpoint and exporters[-1].url))))
+    return TRACER
+
+
+def span(name: str, parent: Span | str | None = None, kind: int = INTERNAL, **attributes: Any):
+    """`Tracer.span` of the process-wide tracer."""
+    return TRACER.span(name, parent, kind, **attributes)
+
+
+def start_span(name: str, parent: Span | str | None = None, kind: int = INTERNAL, **attributes: Any) -> Span:
+    """`Tracer.start` of the process-wide tracer."""
+    return TRACER.start(name, parent, kind, **attributes)
+
+
+@contextmanager
+def traced(name: str, metric: Histogram, **labels: str) -> Iterator[Span]:
+    """Observe the wall time of the block in `metric` and record it as span `name`."""
+    started = time.perf_counter()
+    try:
+        with TRACER.span(name) as current:
+            yield current
+    finally:
+        (metric.labels(**labels) if labels else metric).observe(time.perf_counter() - started)
+
+
+@contextmanager
+def untraced() -> Iterator[None]:
+    """Keep the block, and the tasks it starts, out of the current trace (e.g. background work)."""
+    token = _current.set(NOOP)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def inject(arguments: Mapping[str, Any] | None) -> Mapping[str, Any] | None:
+    """Tool `arguments` plus the current span's traceparent, sampled or not, so the callee follows suit."""
+    current = _current.get()
+    if current is None or current is NOOP:
+        return arguments
+    return {**(arguments or {}), "traceparent": current.traceparent}
+
+
+def load(paths: list[str]) -> dict[str, list[dict]]:
+    """Span records of JSON-lines trace files, grouped by trace id."""
+    traces: dict[str, list[dict]] = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a line torn by a crash
+                traces[record["trace_id"]].append(record)
+    return traces
+
+
+def breakdown(records: list[dict], root: dict) -> list[str]:
+    """`root` and its descendants as an indented tree: offset from the root, duration, attributes."""
+    children: dict[str | None, list[dict]] = defaultdict(list)
+    for record in records:
+        children[record["parent_id"]].append(record)
+    lines = []
+
+    def walk(record: dict, depth: int) -> None:
+        offset = (record["start_ns"] - root["start_ns"]) / 1e9
+        seconds = (record["end_ns"] - record["start_ns"]) / 1e9
+        attributes = " ".join(f"{k}={v}" for k, v in record["attributes"].items())
+        error = f"  ERROR {record['error']}" if record["error"] else ""
+        lines.append(f"{'  ' * depth}{record['name']:<{36 - 2 * depth}} +{offset:8.3f}s {seconds:8.3f}s"
+                     f"  [{record['service']}] {attributes}{error}".rstrip())
+        for child in sorted(children[record["span_id"]], key=lambda r: r["start_ns"]):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Break the slowest traced plies down into their spans.")
+    parser.add_argument("paths", nargs="+", help="TRACE_FILE(s) of the orchestrator and the agents")
+    parser.add_argument("--slowest", type=int, default=5, help="number of plies to show")
+    parser.add_argument("--root", default="ply", help="name of the root spans to rank")
+    args = parser.parse_args()
+
+    traces = load(args.paths)
+    roots = [(record, records) for records in traces.values() for record in records
+             if record["name"] == args.root and record["parent_id"] is None]
+    roots.sort(key=lambda item: item[0]["end_ns"] - item[0]["start_ns"], reverse=True)
+    print(f"{len(roots)} {args.root} traces in {', '.join(args.paths)}")
+    for root, records in roots[:args.slowest]:
+        print(f"\ntrace {root['trace_id']}")
+        print("\n".join(breakdown(records, root)))
@@ -5,6 +5,7 @@
 import os, chess, sys
 from mcp.server.fastmcp import FastMCP
 from autogen_agentchat.agents import AssistantAgent
+from autogen_core import CancellationToken
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 from dotenv import load_dotenv
 load_dotenv()
@@ -73,6 +74,17 @@ async def move_tool(fen: str):
     print("[BlackAgent] Move accepted ->", uci, file=sys.stderr)
     return {"uci": uci}
 
+
+@mcp.tool(
+    name="reset",
+    description="Forget the previous game's conversation before the next game starts."
+)
+async def reset_tool():
+    """Clear the model context between games leased from a worker pool."""
+    await black_llm.on_reset(CancellationToken())
+    print("[BlackAgent] Context reset", file=sys.stderr)
+    return {"ok": True}
+
 if __name__ == "__main__":
     # Initialize and run the server
     print("Starting Black Player Agent...", file=sys.stderr)
@@ -4,10 +4,17 @@ import asyncio
 import json
 import os
 import sys
+import uuid
+from pathlib import Path
 import chess
 import chess.pgn
-from chessboard import display
-from autogen_ext.tools.mcp import McpWorkbench, StdioServerParams
+
+# make the shared mcp_sse helpers importable when started as a plain script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from mcp_sse.game_log import GameLog, JournaledGame, append_pgn, plan_rounds, unfinished
+from mcp_sse.game_state import GameState
+from mcp_sse.gui import make_renderer
+from WorkerPool import StdioWorker, StdioWorkerPool
 
 # Force STDIO transport in child MCP servers
 os.environ.setdefault("MCP_PROTOCOL", "stdio")
@@ -22,107 +29,172 @@ DARK_SQUARE_COLOR = "#8B4513"  # Saddle Brown
 LIGHT_SQUARE_COLOR = "#F5DEB3"  # Wheat
 HIGHLIGHT_COLOR = "#32CD32"  # Lime Green
 
-moves_history = []
-
-async def run() -> None:
-    board = chess.Board()
-    
-    # Start the display with correct parameter names
-    game_board = display.start( )
-                               
-   
-    # Spawn two MCP servers over STDIO
-    white_params = StdioServerParams(
-        command=sys.executable,
-        args=["-u", WHITE_PATH],
-        timeout=90
-    )
-    black_params = StdioServerParams(
-        command=sys.executable,
-        args=["-u", BLACK_PATH],
-        timeout=90
-    )
-
-    async with McpWorkbench(server_params=white_params) as wb_white, \
-               McpWorkbench(server_params=black_params) as wb_black:
-
-        # White starts
-        current_wb, current_name = wb_white, "white"
-        other_wb, other_name     = wb_black, "black"
-        max_num_invalid_moves = 5
-        num_invalid_moves = 0
-
-        while not board.is_game_over():
-            fen = board.fen()
-            print(f"[Board] Asking {current_name} for move. FEN: {fen}", flush=True)
-
-            #call tool by name    
-            result = await current_wb.call_tool("move", {"fen": fen} )  #  [oai_citation:0‡Microsoft GitHub](https://microsoft.github.io/autogen/stable//reference/python/autogen_ext.tools.mcp.html?utm_source=chatgpt.com)
-            print("tool result :", result.result[0].content) 
-            # `result` is a ToolResult; `.content` holds the JSON payload
-            #check if result is not empty and contains a valid move
-            if not result.result[0].content:
-                print(f"[Board] {current_name.title()}Agent error: No move found", flush=True)
-                continue
-            payload = json.loads(result.result[0].content) 
-            print("payload:", payload)
-            #check if result is an error, then try again to get valid move
-            if "error" in payload: # and num_invalid_moves < max_num_invalid_moves:
-                print("num_invalid_moves:", num_invalid_moves)
-                print(f"[Board] {current_name.title()}Agent error:", payload, flush=True)
-                num_invalid_moves += 1
-                continue
-            else:
-                num_invalid_moves = 0
-            
-            uci     = payload.get("uci")
-            print("uci:", uci)
-
-            if not uci:
-                print(f"[Board] {current_name.title()}Agent error:", payload, flush=True)
-                break
-
-            # Validate the move
-            try:
-                mv = chess.Move.from_uci(uci)
-                if mv not in board.legal_moves:
-                    raise ValueError("illegal")
-            except Exception as e:
-                print(f"[Board] Illegal move from {current_name}: {uci} ({e})", flush=True)
-                break
-
-            board.push_uci(uci)
-            
-            display.update(board.fen(), game_board)  
-            print(f"[Board] Applied {uci}", flush=True)
-            
-            moves_history.append(uci)
-
-            # swap players
-            current_wb, other_wb       = other_wb, current_wb
-            current_name, other_name   = other_name, current_name
-            await asyncio.sleep(3)
-
-    if board.is_game_over():
-        result = board.result()
-        reason = "Checkmate" if board.is_checkmate() else (
-                 "Stalemate" if board.is_stalemate() else (
-                 "Insufficient material" if board.is_insufficient_material() else (
-                 "Fifty-move rule" if board.can_claim_fifty_moves() else (
-                 "Threefold repetition" if board.can_claim_threefold_repetition() else "Unknown"))))
-        print(f"[Board] Game over: {result} - Reason: {reason}")
+# HEADLESS=1 skips the GUI import; PLY_DELAY is the pause (seconds) after each ply
+HEADLESS = os.getenv("HEADLESS", "0") == "1"
+PLY_DELAY = float(os.getenv("PLY_DELAY", "0" if HEADLESS else "3"))
+
+# GAMES=N plays N games over warm agent processes: STDIO_WORKERS per color are
+# started once and leased per game (so up to STDIO_WORKERS games run at once);
+# a worker is replaced after STDIO_WORKER_MAX_GAMES games (0 = never)
+GAMES = int(os.getenv("GAMES", "1"))
+STDIO_WORKERS = int(os.getenv("STDIO_WORKERS", "1"))
+STDIO_WORKER_MAX_GAMES = int(os.getenv("STDIO_WORKER_MAX_GAMES", "0"))
+
+# every ply is journaled to GAME_LOG ("" disables it) and interrupted games resume from there,
+# whether the process died or a game stopped on a bad agent reply; finished games are appended
+# to game_record.pgn
+GAME_RECORD = "game_record.pgn"
+GAME_LOG = os.getenv("GAME_LOG", "game_log.jsonl")
+
+
+async def play_game(wb_white: StdioWorker, wb_black: StdioWorker, renderer=None,
+                    name: str = "game", journal: GameLog | None = None,
+                    resume: JournaledGame | None = None,
+                    headers: dict[str, str] | None = None) -> chess.pgn.Game:
+    headers = {**(resume.headers if resume else {}), **(headers or {})}
+    if resume is None:
+        state = GameState()
+        game_id = uuid.uuid4().hex
+        if journal:
+            await journal.start(game_id, name, headers)
+    else:
+        # continue from the journaled position; the agents only ever see the current FEN
+        state = GameState(resume.board())
+        game_id = resume.game_id
+        print(f"[Board] [{name}] Resuming after {state.board.ply()} plies. FEN: {state.board.fen()}", flush=True)
+        if renderer is not None:
+            renderer.update(state.board.fen())
+    board = state.board
+    moves_history = [mv.uci() for mv in board.move_stack]
+
+    # White starts, unless a resumed game is on black's move
+    current_wb, current_name = wb_white, "white"
+    other_wb, other_name     = wb_black, "black"
+    if board.turn == chess.BLACK:
+        current_wb, other_wb       = other_wb, current_wb
+        current_name, other_name   = other_name, current_name
+    max_num_invalid_moves = 5
+    num_invalid_moves = 0
+
+    while not state.is_game_over():
+        fen = board.fen()
+        if num_invalid_moves >= max_num_invalid_moves:
+            # a warm worker that keeps failing would otherwise hold its lease forever
+            print(f"[Board] {current_name.title()}Agent failed {num_invalid_moves} times in a row; stopping", flush=True)
+            break
+        print(f"[Board] Asking {current_name} for move. FEN: {fen}", flush=True)
+
+        #call tool by name    
+        result = await current_wb.call_tool("move", {"fen": fen} )  #  [oai_citation:0‡Microsoft GitHub](https://microsoft.github.io/autogen/stable//reference/python/autogen_ext.tools.mcp.html?utm_source=chatgpt.com)
+        print("tool result :", result.result[0].content) 
+        # `result` is a ToolResult; `.content` holds the JSON payload
+        #check if result is not empty and contains a valid move
+        if not result.result[0].content:
+            print(f"[Board] {current_name.title()}Agent error: No move found", flush=True)
+            num_invalid_moves += 1
+            continue
+        payload = json.loads(result.result[0].content) 
+        print("payload:", payload)
+        #check if result is an error, then try again to get valid move
+        if "error" in payload:
+            print("num_invalid_moves:", num_invalid_moves)
+            print(f"[Board] {current_name.title()}Agent error:", payload, flush=True)
+            num_invalid_moves += 1
+            continue
+        else:
+            num_invalid_moves = 0
+        
+        uci     = payload.get("uci")
+        print("uci:", uci)
+
+        if not uci:
+            print(f"[Board] {current_name.title()}Agent error:", payload, flush=True)
+            break
+
+        # Validate the move
+        try:
+            mv = chess.Move.from_uci(uci)
+            if mv not in board.legal_moves:
+                raise ValueError("illegal")
+        except Exception as e:
+            print(f"[Board] Illegal move from {current_name}: {uci} ({e})", flush=True)
+            break
+
+        state.push(mv)
+        if journal:
+            journal.ply(game_id, board.ply(), uci)
+        
+        if renderer is not None:
+            renderer.update(board.fen())
+        print(f"[Board] [{name}] Applied {uci}", flush=True)
+        
+        moves_history.append(uci)
+
+        # swap players
+        current_wb, other_wb       = other_wb, current_wb
+        current_name, other_name   = other_name, current_name
+        if PLY_DELAY:
+            await asyncio.sleep(PLY_DELAY)
+
+    if state.is_game_over():
+        print(f"[Board] [{name}] Game over: {state.result()} - Reason: {state.reason()}")
 
     pgn = chess.pgn.Game.from_board(board)
+    for key, value in headers.items():
+        pgn.headers[key] = value
+    if journal and state.is_game_over():
+        # a game stopped by a bad reply gets no end record, so the next run resumes it
+        await journal.end(game_id, pgn.headers["Result"], "normal")
     # display the board + history
     print(board)              # ASCII art from python-chess
     print("Moves so far:", " ".join(moves_history), flush=True)
-    print("pgn:", pgn)  
-    with open("game_record.pgn", "w") as f:
-        f.write(str(pgn))
-    print(f"[Board] Game saved to game_record.pgn")
-
-    display.terminate()   
-    await asyncio.sleep(5)
+    print("pgn:", pgn)
+    return pgn
+
+
+async def run(games: int = GAMES, workers: int = STDIO_WORKERS) -> None:
+    # every unfinished game in the journal is resumed first; fresh games fill up to `games`
+    pending = unfinished(GAME_LOG) if GAME_LOG else []
+    journal = GameLog(GAME_LOG) if GAME_LOG else None
+    resumed, numbers = plan_rounds(pending, games)
+    single = len(numbers) == 1
+
+    # the GUI follows a single game only
+    renderer = make_renderer(HEADLESS or not single)
+    renderer.start(chess.Board().fen())
+
+    # Spawn the MCP servers over STDIO once; games lease them from the pools
+    white_pool = StdioWorkerPool(WHITE_PATH, size=workers, timeout=90, max_games=STDIO_WORKER_MAX_GAMES)
+    black_pool = StdioWorkerPool(BLACK_PATH, size=workers, timeout=90, max_games=STDIO_WORKER_MAX_GAMES)
+    played: dict[int, chess.pgn.Game] = {}
+
+    async def one_game(number: int) -> None:
+        async with white_pool.lease() as wb_white, black_pool.lease() as wb_black:
+            game = await play_game(wb_white, wb_black, renderer if single else None,
+                                   name=f"game {number}", journal=journal, resume=resumed.get(number),
+                                   headers={"Round": str(number)} if not single or number in resumed else None)
+        if game.headers["Result"] == "*":
+            # unfinished: left in the journal for the next run instead of recorded truncated
+            print(f"[Board] [game {number}] stopped unfinished; it resumes on the next run", flush=True)
+            return
+        played[number] = game
+        await asyncio.to_thread(append_pgn, GAME_RECORD, game)
+
+    try:
+        async with white_pool, black_pool:
+            results = await asyncio.gather(*(one_game(n) for n in numbers), return_exceptions=True)
+            print(f"[Board] Pools: white {white_pool.stats()}, black {black_pool.stats()}", flush=True)
+    finally:
+        if journal:
+            journal.close()
+    for number, res in zip(numbers, results):
+        if isinstance(res, BaseException):
+            print(f"[Board] [game {number}] crashed: {res!r}", flush=True)
+    print(f"[Board] {len(played)} game(s) appended to {GAME_RECORD}")
+
+    if PLY_DELAY:
+        await asyncio.sleep(PLY_DELAY)  # leave the final position on screen
+    await asyncio.to_thread(renderer.close)
 
 if __name__ == "__main__":
     asyncio.run(run())
\ No newline at end of file
@@ -21,6 +21,7 @@ The move is chosen by an AutoGen AssistantAgent backed by Azure OpenAI."""
 import os, chess, sys
 from mcp.server.fastmcp import FastMCP
 from autogen_agentchat.agents import AssistantAgent
+from autogen_core import CancellationToken
 from autogen_ext.models.openai import AzureOpenAIChatCompletionClient
 # add load env variables
 from dotenv import load_dotenv
@@ -91,6 +92,17 @@ async def move_tool(fen: str):
     print("[WhiteAgent] Move accepted ->", uci, file=sys.stderr)
     return {"uci": uci}
 
+
+@mcp.tool(
+    name="reset",
+    description="Forget the previous game's conversation before the next game starts."
+)
+async def reset_tool():
+    """Clear the model context between games leased from a worker pool."""
+    await white_llm.on_reset(CancellationToken())
+    print("[WhiteAgent] Context reset", file=sys.stderr)
+    return {"ok": True}
+
 if __name__ == "__main__":
     # Initialize and run the server
     print("Starting White Player Agent...", file=sys.stderr)
@@ -0,0 +1,189 @@
+# worker_pool_stdio.py
+"""Warm pool of stdio agent processes for BoardAgent.py.
+
+Spawning WhiteAgent.py / BlackAgent.py costs a Python start, the autogen and
+openai imports and the model client construction before the first move.
+`StdioWorkerPool` starts `size` processes of one agent script up front and
+lends them to games, one game per process at a time (a stdio agent keeps a
+single board and conversation):
+
+    async with pool.lease() as worker:
+        result = await worker.call_tool("move", {"fen": fen})
+
+A call that fails because the process died restarts it and is retried once.
+A restart retries with doubling backoff and raises after a few failed starts,
+so a lease fails (instead of waiting forever) when an agent cannot start.
+A returned worker is asked to `reset` its conversation, so the prompt of the
+next game does not carry the previous ones; one that does not answer, or
+that has served `max_games` games (0 = no limit), is replaced by a fresh
+process before it is leased again.
+"""
+import asyncio
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Mapping
+
+from autogen_core.tools import ToolResult
+from autogen_ext.tools.mcp import McpWorkbench, StdioServerParams
+
+
+class StdioWorker:
+    """One warm agent process and its MCP session."""
+
+    def __init__(self, params: StdioServerParams, name: str, probe_timeout: float = 5.0):
+        self.params = params
+        self.name = name
+        self.probe_timeout = probe_timeout
+        self.workbench: McpWorkbench | None = None
+        self.games = 0
+        self.restarts = 0
+        self.startup_s = 0.0
+
+    async def start(self) -> None:
+        """Spawn the process and wait until its tools answer."""
+        started = time.perf_counter()
+        workbench = McpWorkbench(server_params=self.params)
+        await workbench.start()
+        self.workbench = workbench
+        await workbench.list_tools()
+        self.startup_s = time.perf_counter() - started
+        self.games = 0
+
+    async def stop(self) -> None:
+        workbench, self.workbench = self.workbench, None
+        if workbench is not None:
+            try:
+                await asyncio.wait_for(workbench.stop(), 5)
+            except Exception as e:
+                print(f"[Pool] Stopping {self.name} failed: {e!r}", file=sys.stderr, flush=True)
+
+    async def restart(self, attempts: int = 5, backoff: float = 1.0) -> None:
+        """Replace the process, retrying with doubling backoff; raises after `attempts` failed starts."""
+        await self.stop()
+        for attempt in range(1, attempts + 1):
+            try:
+                await self.start()
+                break
+            except Exception as e:
+                await self.stop()
+                if attempt == attempts:
+                    raise RuntimeError(f"{self.name} did not start after {attempts} attempts: {e!r}") from e
+                delay = backoff * 2 ** (attempt - 1)
+                print(f"[Pool] Restarting {self.name} failed ({attempt}/{attempts}): {e!r}; retrying in {delay:.0f}s",
+                      file=sys.stderr, flush=True)
+                await asyncio.sleep(delay)
+        self.restarts += 1
+        print(f"[Pool] Restarted {self.name} in {self.startup_s:.2f}s", file=sys.stderr, flush=True)
+
+    async def healthy(self) -> bool:
+        if self.workbench is None:
+            return False
+        try:
+            await asyncio.wait_for(self.workbench.list_tools(), self.probe_timeout)
+            return True
+        except Exception:
+            return False
+
+    async def reset(self) -> bool:
+        """Clear the agent's conversation for the next game; False if it did not answer."""
+        if self.workbench is None:
+            return False
+        try:
+            result = await asyncio.wait_for(self.workbench.call_tool("reset"), self.probe_timeout)
+            return not result.is_error
+        except Exception:
+            return False
+
+    async def call_tool(self, name: str, arguments: Mapping[str, Any] | None = None) -> ToolResult:
+        """`McpWorkbench.call_tool`, restarting a dead process and retrying once."""
+        result = await self.workbench.call_tool(name, arguments)
+        if result.is_error and not await self.healthy():
+            print(f"[Pool] {self.name} stopped answering; restarting", file=sys.stderr, flush=True)
+            await self.restart()
+            result = await self.workbench.call_tool(name, arguments)
+        return result
+
+
+class StdioWorkerPool:
+    """`size` warm processes of one stdio agent script, leased one game at a time."""
+
+    def __init__(self,
+                 script: str,
+                 size: int = 1,
+                 env: dict[str, str] | None = None,
+                 cwd: str | None = None,
+                 timeout: float = 90,
+                 max_games: int = 0,
+                 probe_timeout: float = 5.0):
+        params = StdioServerParams(command=sys.executable, args=["-u", script], env=env, cwd=cwd,
+                                   timeout=timeout)
+        self.workers = [StdioWorker(params, f"{script}#{i}", probe_timeout) for i in range(1, max(1, size) + 1)]
+        self.max_games = max_games
+        self._idle: asyncio.Queue[StdioWorker] = asyncio.Queue()
+        self._returns: set[asyncio.Task] = set()
+        self.leases = 0
+        self.lease_wait_s = 0.0
+
+    async def start(self) -> None:
+        """Start every worker concurrently."""
+        await asyncio.gather(*(worker.start() for worker in self.workers))
+        for worker in self.workers:
+            self._idle.put_nowait(worker)
+
+    async def stop(self) -> None:
+        # let in-flight health checks finish before their sessions are closed
+        await asyncio.gather(*self._returns, return_exceptions=True)
+        await asyncio.gather(*(worker.stop() for worker in self.workers))
+
+    async def __aenter__(self) -> "StdioWorkerPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[StdioWorker]:
+        """Borrow an idle worker for one game, waiting if all are busy."""
+        started = time.perf_counter()
+        worker = await self._idle.get()
+        if worker.workbench is None:
+            # its last restart gave up; try once more and fail this lease if it still cannot start
+            try:
+                await worker.restart()
+            except Exception:
+                self._idle.put_nowait(worker)
+                raise
+        self.leases += 1
+        self.lease_wait_s += time.perf_counter() - started
+        try:
+            yield worker
+        finally:
+            worker.games += 1
+            task = asyncio.create_task(self._return(worker))
+            self._returns.add(task)
+            task.add_done_callback(self._returns.discard)
+
+    async def _return(self, worker: StdioWorker) -> None:
+        try:
+            if self.max_games and worker.games >= self.max_games:
+                await worker.restart()
+            elif not await worker.reset():
+                # the reset doubles as the health check
+                print(f"[Pool] {worker.name} did not reset its context; restarting", file=sys.stderr, flush=True)
+                await worker.restart()
+        except Exception as e:
+            # back in the queue without a process: the next lease retries and reports the failure
+            print(f"[Pool] {e}", file=sys.stderr, flush=True)
+        self._idle.put_nowait(worker)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self.workers),
+            "idle": self._idle.qsize(),
+            "leases": self.leases,
+            "lease_wait_avg_s": round(self.lease_wait_s / self.leases, 4) if self.leases else 0.0,
+            "restarts": sum(worker.restarts for worker in self.workers),
+            "startup_s": [round(worker.startup_s, 3) for worker in self.workers],
+        }